@@ -0,0 +1,62 @@
+"""
+Operations per second of each ver2.1 binary operator.
+
+Parses `a <op> b` once and times eval_expr on that node against an env holding a and b,
+so the rate is the operator alone (variable lookups included, no statement or loop
+overhead). The `a` row is a bare variable lookup for reference.
+
+    python benchmarks/binops.py
+    python benchmarks/binops.py --types int str -N 200000
+    python benchmarks/binops.py --path old_ruby.py   # another ver2.1 build
+"""
+import argparse, importlib.util, os, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OPERATORS = ["+", "-", "*", "/", "<", ">", "<=", ">=", "==", "!="]
+OPERANDS = {"int": (7, 3), "float": (7.5, 2.5), "str": ("ab", "cd")}
+STR_OPERATORS = {"+", "<", ">", "<=", ">=", "==", "!="}
+
+def load(path):
+    spec = importlib.util.spec_from_file_location("ros_ver2_1", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def rate(ruby, expr, a, b, n, repeat):
+    node = ruby.Parser(ruby.lex(f"x = {expr}\nend\n")).parse()["stmts"][0]["expr"]
+    env = ruby.Env(ruby.make_global_env({}))
+    env.set_here("a", a)
+    env.set_here("b", b)
+    eval_expr = ruby.eval_expr
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(n):
+            eval_expr(node, env)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return n / best
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ver2.1 binary operator throughput")
+    ap.add_argument("--path", default=os.path.join(ROOT, "ver2.1", "ruby.py"), help="ver2.1 ruby.py to measure")
+    ap.add_argument("-N", type=int, default=100000, help="evaluations per timing")
+    ap.add_argument("-n", "--repeat", type=int, default=5, help="timings per operator (the fastest counts)")
+    ap.add_argument("--types", nargs="+", choices=sorted(OPERANDS), default=["int", "float"], help="operand types")
+    args = ap.parse_args(argv)
+
+    ruby = load(args.path)
+    print(f"{'op':>4} " + " ".join(f"{kind + ' ops/s':>14}" for kind in args.types))
+    for op in [None] + OPERATORS:
+        cells = []
+        for kind in args.types:
+            if kind == "str" and op is not None and op not in STR_OPERATORS:
+                cells.append(f"{'-':>14}")
+                continue
+            a, b = OPERANDS[kind]
+            cells.append(f"{rate(ruby, 'a' if op is None else f'a {op} b', a, b, args.N, args.repeat):14,.0f}")
+        print(f"{'a' if op is None else op:>4} " + " ".join(cells))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Cost of a ver1.4 function call against the number of global variables.
+
+Each program defines G globals and then makes K calls from a while loop; the same
+program with K = 0 is timed too and subtracted, which leaves the cost of the calls.
+With per-call frames the cost per call should stay flat as G grows.
+
+    python benchmarks/call_scaling.py
+    python benchmarks/call_scaling.py --calls 5000 --globals 0 100 10000
+    python benchmarks/call_scaling.py --path old_ruby.py   # another ver1.4 build
+"""
+import argparse, contextlib, importlib.util, io, os, statistics, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def program(globals_count, calls):
+    # "+ 0" everywhere: ver1.4 keeps a single bare token as text instead of evaluating it
+    lines = [f"var g{n} = {n} + 0" for n in range(globals_count)]
+    lines += [
+        "def inc x",
+        "    return x + 1",
+        "endfunc",
+        "var i = 0 + 0",
+        f"while i < {calls}",
+        "    var i = inc(i + 0) + 0",
+        "while end",
+    ]
+    return "\n".join(lines)
+
+def load(path):
+    spec = importlib.util.spec_from_file_location("ros_ver1_4", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def timed(mod, src, repeat):
+    times = []
+    for _ in range(repeat):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            start = time.perf_counter()
+            mod.runRuby(src)
+            times.append(time.perf_counter() - start)
+        if "=== RUNTIME ERROR ===" in out.getvalue():
+            raise RuntimeError(out.getvalue().split("=== RUNTIME ERROR ===", 1)[1].strip().splitlines()[0])
+    return statistics.median(times)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ver1.4 call cost vs number of globals")
+    ap.add_argument("--path", default=os.path.join(ROOT, "ver1.4", "ruby.py"), help="ver1.4 ruby.py to measure")
+    ap.add_argument("--calls", type=int, default=2000, help="calls per program")
+    ap.add_argument("--globals", type=int, nargs="+", default=[0, 1000, 10000], help="global counts to try")
+    ap.add_argument("-n", "--repeat", type=int, default=3, help="timed runs per program")
+    args = ap.parse_args(argv)
+
+    mod = load(args.path)
+    print(f"{'globals':>8} {'per call':>12}")
+    for count in args.globals:
+        base = timed(mod, program(count, 0), args.repeat)
+        total = timed(mod, program(count, args.calls), args.repeat)
+        print(f"{count:8} {(total - base) / args.calls * 1e6:9.1f} us")
+
+if __name__ == "__main__":
+    main()
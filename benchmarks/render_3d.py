@@ -0,0 +1,66 @@
+"""
+Frame time of the ver0.6 line interpreter on code-examples/0.1/3dtest.ru.
+
+The demo loops forever, so a copy is run that stops after N frames; each run is a
+separate process (interpret.py executes its argv[1] on import) and the time of a 0 frame
+run is subtracted to leave the cost of the frames. The default headless backend needs no
+pygame or display; `--backend pygame` uses SDL's dummy video driver.
+
+    python benchmarks/render_3d.py
+    python benchmarks/render_3d.py --backend pygame
+    python benchmarks/render_3d.py --frames 200 -n 5
+    python benchmarks/render_3d.py --path old_interpret.py   # another ver0.6 build
+"""
+import argparse, os, statistics, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEMO = os.path.join(ROOT, "code-examples", "0.1", "3dtest.ru")
+
+def bounded(frames):
+    with open(DEMO, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    # count frames down instead of `while end 1`, and drop the final `end` (it waits for input)
+    out = [f"var new frames {frames}"]
+    for line in lines:
+        if line.strip() == "while end 1":
+            out += ["var math frames - 1 = frames", "while end frames"]
+        elif line.strip() != "end":
+            out.append(line)
+    if frames == 0:
+        # skip the loop body altogether
+        out = [line.replace("while end frames", "while end 0") for line in out]
+        out.insert(out.index("while begin"), "if begin 0")
+        out.insert(out.index("while end 0") + 1, "if end")
+    return "\n".join(out) + "\n"
+
+def timed(path, src, repeat, backend):
+    env = dict(os.environ, ROS_RENDER=backend, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "3dbench.ru")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(src)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, path, script], input="\n", env=env,
+                                  capture_output=True, text=True)
+            times.append(time.perf_counter() - start)
+            if "Error:" in proc.stdout:
+                raise RuntimeError(proc.stdout.split("Error:", 1)[1].strip().splitlines()[0])
+    return statistics.median(times)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ver0.6 3dtest.ru frame time")
+    ap.add_argument("--path", default=os.path.join(ROOT, "ver0.6", "interpret.py"), help="ver0.6 interpret.py to measure")
+    ap.add_argument("--frames", type=int, default=100, help="frames per run")
+    ap.add_argument("-n", "--repeat", type=int, default=3, help="timed runs")
+    ap.add_argument("--backend", choices=["headless", "pygame"], default="headless", help="render backend ($ROS_RENDER)")
+    args = ap.parse_args(argv)
+
+    base = timed(args.path, bounded(0), args.repeat, args.backend)
+    total = timed(args.path, bounded(args.frames), args.repeat, args.backend)
+    per_frame = (total - base) / args.frames
+    print(f"{args.backend}, {args.frames} frames: {total:.3f} s, {per_frame * 1000:.2f} ms/frame ({1 / per_frame:.0f} fps)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark harness for the ros interpreters.
+
+Runs every workload in benchmarks/workloads against ver2.1/ruby.py (`run`, .ros
+sources) and ver1.4/ruby.py (`runRuby`, .ru sources) and records wall times,
+peak traced memory and iterations/sec to JSON, so runs can be compared over time.
+
+    python benchmarks/run.py                        # all workloads, all interpreters
+    python benchmarks/run.py -k fib -i ver2.1 -n 10
+    python benchmarks/run.py --out before.json
+    python benchmarks/run.py --compare before.json after.json
+"""
+import argparse, contextlib, importlib.util, io, json, os, platform, statistics, subprocess, sys, time, tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKLOADS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workloads")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# workload name -> (units of work one run does (loop iterations / calls / imports),
+# the result it prints); a run that does not print its result fails instead of being timed
+WORKLOADS = {
+    "fib_loop": (20000, "75025"),
+    "recursion": (5167, "1597"),  # calls made by fib(17)
+    "string_build": (5000, "5000"),
+    "list_dict_churn": (4000, "3998000"),
+    "method_calls": (3000, "3000"),
+    "imports": (200, "20100"),
+    "while_loop": (100000, "5000050000"),
+}
+
+# interpreter name -> (path, source extension, runner(module, src, modules))
+INTERPRETERS = {
+    "ver2.1": ("ver2.1/ruby.py", ".ros", lambda mod, src, modules: mod.run(src, files=modules)),
+    "ver1.4": ("ver1.4/ruby.py", ".ru", lambda mod, src, modules: mod.runRuby(src, modules)),
+}
+
+def load_interpreter(name):
+    path = os.path.join(ROOT, INTERPRETERS[name][0])
+    spec = importlib.util.spec_from_file_location(f"ros_{name.replace('.', '_')}", path)
+    mod = importlib.util.module_from_spec(spec)
+    # the interpreters print while importing (and ver1.4 on every run), keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(mod)
+    return mod
+
+def read_modules(ext):
+    modules = {}
+    folder = os.path.join(WORKLOADS_DIR, "modules")
+    for fname in sorted(os.listdir(folder)):
+        if fname.endswith(ext):
+            with open(os.path.join(folder, fname), "r", encoding="utf-8") as f:
+                modules[fname[:-len(ext)]] = f.read()
+    return modules
+
+def bench(runner, mod, src, modules, repeat, expected):
+    times = []
+    for _ in range(repeat):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            start = time.perf_counter()
+            runner(mod, src, modules)
+            times.append(time.perf_counter() - start)
+        # ver1.4 reports runtime errors on stdout instead of raising them
+        if "=== RUNTIME ERROR ===" in out.getvalue():
+            detail = out.getvalue().split("=== RUNTIME ERROR ===", 1)[1].strip().splitlines()
+            raise RuntimeError(detail[0] if detail else "runtime error")
+        printed = [line.strip() for line in out.getvalue().splitlines() if line.strip()]
+        if expected not in printed:
+            raise RuntimeError(f"wrong result: expected {expected}, printed {printed[-3:]}")
+    # memory is measured in its own pass, tracemalloc would skew the timings
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner(mod, src, modules)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return times, peak
+
+def run_all(names, pattern, repeat):
+    results = []
+    for name in names:
+        path, ext, runner = INTERPRETERS[name]
+        try:
+            mod = load_interpreter(name)
+        except Exception as e:
+            print(f"{name}: can not load {path}: {type(e).__name__}: {e}", file=sys.stderr)
+            results.append({"interpreter": name, "workload": None, "error": f"{type(e).__name__}: {e}"})
+            continue
+        modules = read_modules(ext)
+        for workload, (iterations, expected) in WORKLOADS.items():
+            if pattern and pattern not in workload:
+                continue
+            with open(os.path.join(WORKLOADS_DIR, workload + ext), "r", encoding="utf-8") as f:
+                src = f.read()
+            entry = {"interpreter": name, "workload": workload, "iterations": iterations}
+            try:
+                times, peak = bench(runner, mod, src, modules, repeat, expected)
+            except Exception as e:
+                entry["error"] = f"{type(e).__name__}: {e}"
+                print(f"{name:8} {workload:16} error: {entry['error']}", file=sys.stderr)
+            else:
+                median = statistics.median(times)
+                entry.update({
+                    "times": times,
+                    "min": min(times),
+                    "median": median,
+                    "iters_per_sec": iterations / median if median else None,
+                    "peak_bytes": peak,
+                })
+                print(f"{name:8} {workload:16} median {median * 1000:9.2f} ms  "
+                      f"{entry['iters_per_sec']:12.0f} it/s  peak {peak / 1024:9.1f} KiB")
+            results.append(entry)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare(old_path, new_path):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {(r["interpreter"], r["workload"]): r for r in json.load(f)["results"]}
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    print(f"{'interpreter':12} {'workload':16} {'old ms':>10} {'new ms':>10} {'speedup':>8} {'peak ratio':>10}")
+    for r in new:
+        before = old.get((r["interpreter"], r["workload"]))
+        if before is None or "median" not in r or "median" not in before:
+            continue
+        speedup = before["median"] / r["median"] if r["median"] else float("inf")
+        peak = r["peak_bytes"] / before["peak_bytes"] if before["peak_bytes"] else float("inf")
+        print(f"{r['interpreter']:12} {r['workload']:16} {before['median'] * 1000:10.2f} "
+              f"{r['median'] * 1000:10.2f} {speedup:7.2f}x {peak:9.2f}x")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the ros interpreters")
+    ap.add_argument("-n", "--repeat", type=int, default=5, help="timed runs per workload")
+    ap.add_argument("-k", "--filter", default="", help="only workloads whose name contains this")
+    ap.add_argument("-i", "--interpreter", action="append", choices=sorted(INTERPRETERS),
+                    help="interpreter to run (repeatable, default all)")
+    ap.add_argument("--out", help="JSON output path (default benchmarks/results/<timestamp>.json)")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run_all(args.interpreter or list(INTERPRETERS), args.filter, args.repeat)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Startup-time check for the ros interpreters.
+
+Imports each interpreter under `python -X importtime`, takes the median cumulative
+import time of the module over a few runs and fails (exit 1) when it is over budget or
+when a module that must stay lazy (asyncio, requests, ...) got imported. Also reports
+the cold-start wall time of running a hello-world script next to a bare `python -c pass`.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py -n 20 --budget ver2.1=10
+"""
+import argparse, os, statistics, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# interpreter name -> (directory, import budget in ms, modules importing it must not pull in)
+INTERPRETERS = {
+    "ver2.1": ("ver2.1", 15.0, ["asyncio", "concurrent.futures", "pickle", "tracemalloc", "hashlib"]),
+    "ver1.4": ("ver1.4", 20.0, ["requests", "subprocess"]),
+}
+
+HELLO = 'print("hello")\nend\n'
+
+def child_env():
+    env = dict(os.environ)
+    # with bytecode writes disabled every run would include compiling the whole interpreter
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+def import_profile(folder):
+    """Return (cumulative import time of `ruby` in ms, names of every module imported on the way)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import ruby"], cwd=folder,
+                          env=child_env(), capture_output=True, text=True, check=True)
+    total, modules = None, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        modules.add(name)
+        if name == "ruby":
+            total = int(cumulative) / 1000
+    return total, modules
+
+def wall(cmd, cwd, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=child_env(), stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Check ros interpreter startup time")
+    ap.add_argument("-n", "--repeat", type=int, default=10, help="runs per measurement")
+    ap.add_argument("--budget", action="append", default=[], metavar="NAME=MS",
+                    help="override an interpreter's import budget (repeatable)")
+    args = ap.parse_args(argv)
+    budgets = {name: budget for name, (_, budget, _) in INTERPRETERS.items()}
+    for item in args.budget:
+        name, ms = item.split("=", 1)
+        budgets[name] = float(ms)
+
+    failed = False
+    for name, (folder, _, lazy) in INTERPRETERS.items():
+        folder = os.path.join(ROOT, folder)
+        import_profile(folder)  # first run writes the .pyc
+        samples, modules = [], set()
+        for _ in range(args.repeat):
+            total, seen = import_profile(folder)
+            samples.append(total)
+            modules |= seen
+        median = statistics.median(samples)
+        eager = [m for m in lazy if m in modules]
+        ok = median <= budgets[name] and not eager
+        failed |= not ok
+        print(f"{name:8} import {median:7.2f} ms (budget {budgets[name]:.1f} ms)  {'ok' if ok else 'FAIL'}")
+        if eager:
+            print(f"{'':8} imported eagerly: {', '.join(eager)}")
+
+    # cold start of a whole run, python's own startup included
+    with tempfile.TemporaryDirectory() as tmp:
+        hello = os.path.join(tmp, "hello.ros")
+        with open(hello, "w", encoding="utf-8") as f:
+            f.write(HELLO)
+        folder = os.path.join(ROOT, "ver2.1")
+        bare = wall([sys.executable, "-c", "pass"], folder, args.repeat)
+        script = wall([sys.executable, "ruby.py", hello], folder, args.repeat)
+        module = wall([sys.executable, "-m", "ruby", hello], folder, args.repeat)
+    print(f"cold start: python -c pass {bare:.1f} ms, python ruby.py hello.ros {script:.1f} ms, "
+          f"python -m ruby hello.ros {module:.1f} ms")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
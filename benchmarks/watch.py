@@ -0,0 +1,84 @@
+"""
+Turnaround of ver2.1's --watch mode after an edit.
+
+Generates a project (a main script importing N library modules of F functions each),
+then times a cold start (read and parse everything, run) against the watcher's
+response to editing one module (poll, re-read and re-parse that file, run again).
+Polling adds up to one interval (--watch default 0.05 s) on top of the edit time.
+
+    python benchmarks/watch.py
+    python benchmarks/watch.py --modules 50 --functions 40 -n 10
+"""
+import argparse, contextlib, importlib.util, io, os, statistics, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def module_source(index, functions, tag=0):
+    lines = ["module = {}"]
+    for n in range(functions):
+        lines += [
+            f"def module.f{n}(self, x)",
+            "    total = 0",
+            "    for (i = 0; i < 3; i = i + 1)",
+            f"        total = total + x * {n} + i + {index * 1000 + tag}",
+            "    end",
+            "    return total",
+            "end",
+        ]
+    return "\n".join(lines + ["end", ""])
+
+def make_project(folder, modules, functions):
+    libs = os.path.join(folder, "libs")
+    os.makedirs(libs)
+    for m in range(modules):
+        with open(os.path.join(libs, f"lib{m}.ros"), "w", encoding="utf-8") as f:
+            f.write(module_source(m, functions))
+    main = [f'import "lib{m}.ros"' for m in range(modules)]
+    main += [f"lib{m}.f0(1)" for m in range(modules)]
+    path = os.path.join(folder, "main.ros")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(main + ["end", ""]))
+    return path, libs
+
+def load():
+    spec = importlib.util.spec_from_file_location("ros_ver2_1", os.path.join(ROOT, "ver2.1", "ruby.py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ver2.1 --watch turnaround")
+    ap.add_argument("--modules", type=int, default=30, help="library modules in the project")
+    ap.add_argument("--functions", type=int, default=30, help="functions per module")
+    ap.add_argument("-n", "--repeat", type=int, default=5, help="edits to time")
+    args = ap.parse_args(argv)
+
+    ruby = load()
+    with tempfile.TemporaryDirectory() as tmp:
+        path, libs = make_project(tmp, args.modules, args.functions)
+        cold = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            watcher = ruby.Watcher(path, libs)
+            watcher.poll()
+            with contextlib.redirect_stdout(io.StringIO()):
+                watcher.run_once()
+            cold.append(time.perf_counter() - start)
+        edits = []
+        target = os.path.join(libs, "lib0.ros")
+        for n in range(args.repeat):
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(module_source(0, args.functions, tag=n + 1))
+            start = time.perf_counter()
+            changed = watcher.poll()
+            with contextlib.redirect_stdout(io.StringIO()):
+                watcher.run_once()
+            edits.append(time.perf_counter() - start)
+            assert changed == {target}, changed
+    lines = args.modules * (args.functions * 7 + 2)
+    print(f"{args.modules} modules, ~{lines} lines")
+    print(f"cold start     {statistics.median(cold) * 1000:8.1f} ms")
+    print(f"edit + re-run  {statistics.median(edits) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
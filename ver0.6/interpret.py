@@ -1,8 +1,13 @@
 
 try:
-    import os, random, math
-    import re, time, pygame
+    import os, random, math, functools
+    import re, time
     import string
+    import render
+    try:
+        import pygame
+    except ImportError:
+        pygame = None
     from sys import argv
     sources = {}
     sources["main"] = open(argv[1], "r").readlines()
@@ -83,18 +88,18 @@ try:
 
 
 
-    def safeExec(code):
-        allowed_builtins = {
-            "print": print,
-            "input": input,
-            "format": format,
-            "range": range,
-            "len": len,
-            "open": open
-        }
+    allowed_builtins = {
+        "print": print,
+        "input": input,
+        "format": format,
+        "range": range,
+        "len": len,
+        "open": open
+    }
 
-        exec_globals = {
-            "__builtins__": allowed_builtins,
+    def pythonGlobals():
+        return {
+            "__builtins__": dict(allowed_builtins),
             "accessFunction": axcessFunction,
             "editVariable": editOrAddVariables,
             "get_variable": get_variable,
@@ -108,6 +113,18 @@ try:
             "datetime": __import__("datetime").datetime
         }
 
+    # INTERPRETER_LANG blocks of a source share one globals dict (each run still gets fresh locals)
+    pyNamespaces = {}
+
+    @functools.lru_cache(maxsize=1024)
+    def compilePython(code, source):
+        return compile(code, f"<INTERPRETER_LANG {source}>", "exec")
+
+    def safeExec(code, source=None):
+        exec_globals = pythonGlobals() if source is None else pyNamespaces.get(source)
+        if exec_globals is None:
+            exec_globals = pyNamespaces[source] = pythonGlobals()
+
         try:
             exec(code, exec_globals, {})
         except Exception as e:
@@ -195,529 +212,605 @@ try:
     namespace = {}
     # {name:{function 1: (start_index, # of args), function 2: (start_index, # of args) ... function n: (start_index, # of args)}}
 
-    current_source = "main"
-    current_lines = sources[current_source]
-    current_index = 0
-
-    while True:
-        if current_index >= len(current_lines):
-            if functionStack:
-                # Return to caller if stack isn't empty
-                current_source, current_index = functionStack.pop()
+    # ===== loader =====
+    # every line is decoded once into an instruction tuple (handler, operands...), one per line so
+    # line numbers stay valid jump targets. Operands are (LITERAL, value) for numbers and strings,
+    # decoded here, or (NAME, token), looked up when the instruction runs (parseValue handles the rest)
+    LITERAL, NAME = 0, 1
+    NUMBER = (int, float)
+    number = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)")
+
+    def operand(token):
+        if (token.startswith("'") and token.endswith("'")) or (token.startswith('"') and token.endswith('"')):
+            return (LITERAL, token[1:-1])
+        if number.fullmatch(token):
+            return (LITERAL, float(token) if "." in token else int(token))
+        return (NAME, token)
+
+    def value(o):
+        if o[0] == LITERAL:
+            return o[1]
+        if o[1] in variables:
+            return variables[o[1]]
+        return parseValue(o[1])[0]
+
+    BINARY = {
+        "+": lambda a, b: a + b,
+        "-": lambda a, b: a - b,
+        "*": lambda a, b: a * b,
+        "//": lambda a, b: a // b,
+        "/": lambda a, b: a / b,
+        "**": lambda a, b: a ** b,
+        "&": lambda a, b: a & b,
+        "|": lambda a, b: a | b,
+        "^": lambda a, b: a ^ b,
+        "==": lambda a, b: 1 if a == b else 0,
+        "!=": lambda a, b: 1 if a != b else 0,
+        ">=": lambda a, b: 1 if a >= b else 0,
+        "<=": lambda a, b: 1 if a <= b else 0,
+        ">": lambda a, b: 1 if a > b else 0,
+        "<": lambda a, b: 1 if a < b else 0,
+        "and": lambda a, b: 1 if a and b else 0,
+        "or": lambda a, b: 1 if a or b else 0,
+    }
+    UNARY = {
+        "sqrt": lambda a: a ** 0.5,
+        "cbrt": lambda a: a ** (1/3),
+        "~": lambda a: ~a,
+        "not": lambda a: 0 if a else 1,
+        "tan": math.tan,
+        "sin": math.sin,
+        "cos": math.cos,
+    }
+
+    def ifEnd(index, tokens):
+        depth = 1
+        for j in range(index + 1, len(tokens)):
+            if len(tokens[j]) > 1 and tokens[j][0] == "if":
+                if tokens[j][1] == "begin":
+                    depth += 1
+                elif tokens[j][1] == "end":
+                    depth -= 1
+                    if depth == 0:
+                        return j
+        return len(tokens)
+
+    def firstReturn(index, tokens):
+        for j in range(index, len(tokens)):
+            if tokens[j] and tokens[j][0] == "return":
+                return j
+        return None
+
+    def pythonBlock(index, tokens, lines):
+        py_lines = []
+        for j in range(index + 1, len(lines)):
+            if not tokens[j]:
                 continue
-            else:
+            if tokens[j][0] == "INTERPRETER_LANG" and len(tokens[j]) > 1 and tokens[j][1] == "end":
                 break
+            py_lines.append(lines[j])
+        return "".join(py_lines)
 
-        line = current_lines[current_index]
-
-        parsed = tokenize(line)
+    def decode(parsed, index, tokens, lines, source):
         if not parsed:
-            current_index += 1
-            continue
-
+            return (opNop,)
         cmd = parsed[0]
         args = parsed[1:]
-
         match cmd:
-            case "print":
-                out = "".join(str(parseValue(token, variables)[0]) for token in args)
-                print(out.strip())
-            
-            case "flush":
-                out = "".join(str(parseValue(token, variables)[0]) for token in args)
-                print(out.strip(), flush=1, end='\r')
-            
+            case "print" | "flush":
+                return (opPrint, [operand(token) for token in args], cmd == "flush")
             case "rnd":
-                match args[0]:
-                    case "int":
-                        parsed1 = parseValue(args[1], variables)
-                        origin = parseValue(args[2])
-                        stop = parseValue(args[3])
-                        if parsed1[1] not in ["var int", "var str"]:
-                            raise NameError(f"Can not assign a random int value to a literal on line {current_index} in {current_source}")
-                        if origin[1] not in ["literal int", "var int"] or stop[1] not in ["literal int", "var int"]:
-                            raise ValueError(f"origin | stop has to be a int for a random int genreation on line {current_index} in {current_source}")
-                        
-                        variables[args[1]] = random.randint(origin[0], stop[0])
-                    
-                    case "str":
-                        parsed1 = parseValue(args[1])
-                        length = parseValue(args[2])
-                        if parsed1[1] not in ["var int", "var str"]:
-                            raise NameError(f"Can not assign a random string value to a literal on line {current_index} in {current_source}")
-                        if origin[1] not in ["literal int", "var int"] or stop[1] not in ["literal int", "var int"]:
-                            raise ValueError(f"length has to be a int for a random str genreation on line {current_index} in {current_source}")
-                        
-                        _ = ""
-                        for i in range(length[0]): _ += string.printable[random.randint(0, len(string.printable) - 1)]
-                        variables[args[1]] = _
-                        
+                return (opRnd, args)
             case "INTERPRETER_LANG":
-                match args[0]:
-                    case "begin":
-                        py_lines = []
-                        for j in range(current_index + 1, len(current_lines)):
-                            tokens = tokenize(current_lines[j])
-                            if not tokens:
-                                continue
-                            if tokens[0] == "INTERPRETER_LANG" and tokens[1] == "end":
-                                break
-                            py_lines.append(current_lines[j])
-                        
-                        safeExec("".join(py_lines))
-                        
-                    case "end":
-                        # This is handled by the loop, so we just continue
-                        pass
-
+                if args[0] == "begin":
+                    # compiled here once, a bad block still only fails when it is reached
+                    try:
+                        block = compilePython(pythonBlock(index, tokens, lines), source)
+                    except Exception as e:
+                        return (opFail, lambda e=e: RuntimeError(f"Error executing code: {e}"))
+                    return (opPython, block)
             case "itrables":
-                match args[0]:
-                    case "new":
-                        parsed1 = parseValue(args[2])
-                        if parsed1[1] not in ["array", "dict", "list"]:
-                            raise ValueError("Can not set a itrable to a constant value")
-                        variables[args[1]] = parsed1[0]
-
-                    case "do":
-                        # Binary operation: var math <operand1> <op> <operand2> = <target>
-                        if len(args) == 6 and args[4] == "=":
-                            parsed1 = parseValue(args[1])
-                            parsed2 = parseValue(args[3])
-                            op = args[2]
-                            # Check if both operands are ints...
-                            if parsed1[1] in ["itralbe array", "itralbe list"] and parsed2[1] in ["var int", "literal int", "itralbe array", "itralbe list", "itralbe dict", "var str", "literal str"]:
-                                value1 = parsed1[0]
-                                value2 = parsed2[0]
-                                match op:
-                                    case "append": result = value1.append(value2)
-                                    case "pop": result = value1.pop(value2)
-                                    case "*": result = value1 * value2
-                                    case "//": result = value1 // value2
-                                    case "/": result = value1 / value2
-                                    case "**": result = value1 ** value2
-                                    case "&": result = value1 & value2
-                                    case "|": result = value1 | value2
-                                    case "^": result = value1 ^ value2
-                                    case "==": result = 1 if value1 == value2 else 0
-                                    case "!=": result = 1 if value1 != value2 else 0
-                                    case ">=": result = 1 if value1 >= value2 else 0
-                                    case "<=": result = 1 if value1 <= value2 else 0
-                                    case ">": result = 1 if value1 > value2 else 0
-                                    case "<": result = 1 if value1 < value2 else 0
-                                    case "and": result = 1 if value1 and value2 else 0
-                                    case "or": result = 1 if value1 or value2 else 0
-                                    case _:
-                                        raise ValueError(f"On line {current_index} in {current_source}: Unsupported operator '{op}' for int operands.")
-                                variables[args[5]] = float(result)
-                            # Both operands are strings
-                            elif parsed1[1] in ["var str", "literal str"] and parsed2[1] in ["var str", "literal str"]:
-                                if op not in ["+", "==", "!="]:
-                                    raise ValueError(f"On line {current_index} in {current_source}: For string operands, only '+', '==' and '!=' are allowed.")
-                                if op == "+":
-                                    variables[args[5]] = parsed1[0] + parsed2[0]
-                                elif op == "==":
-                                    variables[args[5]] = 1 if parsed1[0] == parsed2[0] else 0
-                                elif op == "!=":
-                                    variables[args[5]] = 1 if parsed1[0] != parsed2[0] else 0
-                            else:
-                                raise ValueError(f"On line {current_index} in {current_source}: Mixing types is not allowed in binary math.")
-                        # Mono-operation: var math <operand> <op> = <target>
-                        elif len(args) == 5 and args[3] == "=":
-                            parsed1 = parseValue(args[1])
-                            op = args[2]
-                            if parsed1[1] in ["var int", "literal int"]:
-                                value1 = parsed1[0]
-                                match op:
-                                    case "sqrt": result = value1 ** 0.5
-                                    case "cbrt": result = value1 ** (1/3)
-                                    case "~": result = ~value1
-                                    case "not": result = 0 if value1 else 1
-                                    case "tan": result = math.tan(value1)
-                                    case "sin": result = math.sin(value1)
-                                    case "cos": result = math.cos(value1)
-                                    case _:
-                                        raise ValueError(f"On line {current_index} in {current_source}: Unsupported operator '{op}' for int operand.")
-                                variables[args[4]] = float(result)
-                            elif parsed1[1] in ["var str", "literal str"]:
-                                if op != "not":
-                                    raise ValueError(f"On line {current_index} in {current_source}: For string operand, only 'not' is allowed.")
-                                # For a string: non-empty is True -> convert to 0; empty is False -> convert to 1.
-                                variables[args[4]] = 0 if parsed1[0] else 1
-                            else:
-                                raise ValueError(f"On line {current_index} in {current_source}: Invalid operand type in mono math.")
-                        else:
-                            raise ValueError(f"On line {current_index} in {current_source}: Invalid math syntax.")
-                    case "set":
-                        if args[2] != "=":
-                            raise SyntaxError(f"= not found in | line {current_index} in {current_source} | syntax error")
-                        parsed1 = parseValue(args[1])
-                        parsed2 = parseValue(args[3])
-                        if parsed1[1] not in ["var str", "var int"]:
-                            raise ValueError(f"On line {current_index} in {current_source}: Invalid var name, variable not found")
-                        variables[args[1]] = parsed2[0]
-
+                return (opItrables, args)
             case "var":
                 match args[0]:
                     case "new":
-                        parsed1 = parseValue(args[2])
-                        variables[args[1]] = parsed1[0]
+                        return (opVarNew, args[1], operand(args[2]))
                     case "math":
                         # Binary operation: var math <operand1> <op> <operand2> = <target>
                         if len(args) == 6 and args[4] == "=":
-                            parsed1 = parseValue(args[1])
-                            parsed2 = parseValue(args[3])
-                            op = args[2]
-                            # Check if both operands are ints...
-                            if parsed1[1] in ["var int", "literal int"] and parsed2[1] in ["var int", "literal int"]:
-                                value1 = parsed1[0]
-                                value2 = parsed2[0]
-                                match op:
-                                    case "+": result = value1 + value2
-                                    case "-": result = value1 - value2
-                                    case "*": result = value1 * value2
-                                    case "//": result = value1 // value2
-                                    case "/": result = value1 / value2
-                                    case "**": result = value1 ** value2
-                                    case "&": result = value1 & value2
-                                    case "|": result = value1 | value2
-                                    case "^": result = value1 ^ value2
-                                    case "==": result = 1 if value1 == value2 else 0
-                                    case "!=": result = 1 if value1 != value2 else 0
-                                    case ">=": result = 1 if value1 >= value2 else 0
-                                    case "<=": result = 1 if value1 <= value2 else 0
-                                    case ">": result = 1 if value1 > value2 else 0
-                                    case "<": result = 1 if value1 < value2 else 0
-                                    case "and": result = 1 if value1 and value2 else 0
-                                    case "or": result = 1 if value1 or value2 else 0
-                                    case _:
-                                        raise ValueError(f"On line {current_index} in {current_source}: Unsupported operator '{op}' for int operands.")
-                                variables[args[5]] = float(result)
-                            # Both operands are strings
-                            elif parsed1[1] in ["var str", "literal str"] and parsed2[1] in ["var str", "literal str"]:
-                                if op not in ["+", "==", "!="]:
-                                    raise ValueError(f"On line {current_index} in {current_source}: For string operands, only '+', '==' and '!=' are allowed.")
-                                if op == "+":
-                                    variables[args[5]] = parsed1[0] + parsed2[0]
-                                elif op == "==":
-                                    variables[args[5]] = 1 if parsed1[0] == parsed2[0] else 0
-                                elif op == "!=":
-                                    variables[args[5]] = 1 if parsed1[0] != parsed2[0] else 0
-                            else:
-                                raise ValueError(f"On line {current_index} in {current_source}: Mixing types is not allowed in binary math.")
+                            return (opMath2, operand(args[1]), args[2], operand(args[3]), args[5], BINARY.get(args[2]))
                         # Mono-operation: var math <operand> <op> = <target>
-                        elif len(args) == 5 and args[3] == "=":
-                            parsed1 = parseValue(args[1])
-                            op = args[2]
-                            if parsed1[1] in ["var int", "literal int"]:
-                                value1 = parsed1[0]
-                                match op:
-                                    case "sqrt": result = value1 ** 0.5
-                                    case "cbrt": result = value1 ** (1/3)
-                                    case "~": result = ~value1
-                                    case "not": result = 0 if value1 else 1
-                                    case "tan": result = math.tan(value1)
-                                    case "sin": result = math.sin(value1)
-                                    case "cos": result = math.cos(value1)
-                                    case _:
-                                        raise ValueError(f"On line {current_index} in {current_source}: Unsupported operator '{op}' for int operand.")
-                                variables[args[4]] = float(result)
-                            elif parsed1[1] in ["var str", "literal str"]:
-                                if op != "not":
-                                    raise ValueError(f"On line {current_index} in {current_source}: For string operand, only 'not' is allowed.")
-                                # For a string: non-empty is True -> convert to 0; empty is False -> convert to 1.
-                                variables[args[4]] = 0 if parsed1[0] else 1
-                            else:
-                                raise ValueError(f"On line {current_index} in {current_source}: Invalid operand type in mono math.")
-                        else:
-                            raise ValueError(f"On line {current_index} in {current_source}: Invalid math syntax.")
+                        if len(args) == 5 and args[3] == "=":
+                            return (opMath1, operand(args[1]), args[2], args[4], UNARY.get(args[2]))
+                        return (opFail, lambda: ValueError(f"On line {current_index} in {current_source}: Invalid math syntax."))
                     case "set":
                         if args[2] != "=":
-                            raise SyntaxError(f"= not found in | line {current_index} in {current_source} | syntax error")
-                        parsed1 = parseValue(args[1])
-                        parsed2 = parseValue(args[3])
-                        if parsed1[1] not in ["var str", "var int"]:
-                            raise ValueError(f"On line {current_index} in {current_source}: Invalid var name, variable not found")
-                        variables[args[1]] = parsed2[0]
-
+                            return (opFail, lambda: SyntaxError(f"= not found in | line {current_index} in {current_source} | syntax error"))
+                        return (opVarSet, args[1], operand(args[3]))
             case "while":
                 match args[0]:
                     case "begin":
-                        whileLoops.append(current_index)
+                        return (opWhileBegin,)
                     case "end":
-                        if not whileLoops:
-                            raise SyntaxError(f"Unexpected while end with no matching begin | line {current_index} in {current_source}")
-                        parsed1 = parseValue(args[1])
-                        lastLoopIndex = whileLoops.pop()
-                        if parsed1[0]:
-                            current_index = lastLoopIndex - 1
-
-
+                        return (opWhileEnd, operand(args[1]))
             case "if":
-                match args[0]:
-                    case "begin":
-                        parsed1 = parseValue(args[1])
-                        if not parsed1[0]:
-                            depth = 1
-                            j = current_index + 1
-                            while j < len(current_lines):
-                                tokens = tokenize(current_lines[j])
-                                if tokens:
-                                    if tokens[0] == "if" and tokens[1] == "begin":
-                                        depth += 1
-                                    elif tokens[0] == "if" and tokens[1] == "end":
-                                        depth -= 1
-                                        if depth == 0:
-                                            break
-                                j += 1
-                            current_index = j
-                    case "end":
-                        pass
-
+                if args[0] == "begin":
+                    return (opIfBegin, operand(args[1]), ifEnd(index, tokens))
             case "def":
-                func_name = args[0]
-                num_args = parseValue(args[1])
-                if num_args[1] not in ["literal int"]:
-                    raise SyntaxError(f"invalid function syntax | line {current_index} in {current_source} |")
-                num_args = num_args[0]
-
-                start_index = current_index + 1
-                end_index = None
-                for j in range(start_index, len(current_lines)):
-                    tokens = tokenize(current_lines[j])
-                    if tokens and tokens[0] == "return":
-                        end_index = j
-                        break
-                if end_index is None:
-                    raise ValueError(f"Function {func_name} has no return statement.")
-                functionIndexs[current_source][func_name] = (start_index, num_args, end_index)
-                current_index = end_index
-                current_lines = sources[current_source]
-                continue
-
+                return (opDef, args[0], operand(args[1]), index + 1, firstReturn(index + 1, tokens))
             case "return":
-                ret_val = parseValue(args[0])[0]
-                variables["return"] = ret_val
-                if functionStack:
-                    current_source, current_index = functionStack.pop()
-                    current_lines = sources[current_source]
-                    continue
-
+                return (opReturn, operand(args[0]))
             case "call":
-                func_name = args[0]
-                found = None
-
-                # Search all sources for the function
-                for source_id, funcs in functionIndexs.items():
-                    if func_name in funcs:
-                        found = (source_id, funcs[func_name])
-                        break
-
-                if not found:
-                    raise ValueError(f"Function {func_name} not defined | line {current_index} in {current_source}")
-
-                target_source, (start_index, num_args, end_index) = found
-
-                if len(args[1:]) != num_args:
-                    raise ValueError(f"Function {func_name} expects {num_args} arguments, got {len(args[1:])} | line {current_index} in {current_source}")
-
-                # Set up arguments
-                for idx, arg in enumerate(args[1:]):
-                    variables[f"arg{idx+1}"] = parseValue(arg)[0]
-
-                # Save current position to return to
-                functionStack.append((current_source, current_index + 1))
-
-                # Switch to called function
-                current_source = target_source
-                current_lines = sources[current_source]
-                current_index = start_index
-                continue
-
+                return (opCall, args[0], [(f"arg{idx+1}", operand(arg)) for idx, arg in enumerate(args[1:])])
             case "delay":
-                parsed1 = parseValue(args[0])
-                if parsed1[1] in ["var int", "literal int"]:
-                    time.sleep(parsed1[0])
-                else:
-                    raise ValueError(f"On line {current_index} in {current_source}: delay value must be an int")
+                return (opDelay, operand(args[0]))
             case "input":
-                parsed1 = parseValue(args[0])
-                parsed2 = parseValue(args[1])
-                if parsed1[1] not in ["var str", "literal str"]:
-                    raise ValueError(f"On line {current_index} in {current_source}: prompt string must be a string")
-                if parsed2[1] not in ["var str", "var int"]:
-                    raise ValueError(f"On line {current_index} in {current_source}: target variable must be a variable")
-                variables[args[1]] = input(parsed1[0])
+                return (opInput, args)
             case "convert":
-                parsed1 = parseValue(args[0])
-                parsed2 = parseValue(args[1])
-                if parsed2[1] not in ["var str", "var int"]:
-                    raise ValueError(f"On line {current_index} in {current_source}: target variable not found or is not a convertable type of [int -> str, str -> int]")
-                if isinstance(parsed1[0], float) or isinstance(parsed1[0], int):
-                    variables[args[1]] = str(parsed1[0])
-                elif isinstance(parsed1[0], str):
-                    try:
-                        variables[args[1]] = float(parsed1[0])
-                    except ValueError:
-                        raise ValueError(f"wrong format str convert int value | line {current_index} in {current_source} | int convert error")
+                return (opConvert, args)
             case "window":
                 match args[0]:
                     case "init":
-                        parsed1 = parseValue(args[1])
-                        parsed2 = parseValue(args[2])
-
-                        if parsed1[1] not in ["var int", "literal int"] or parsed2[1] not in ["var int", "literal int"]:
-                            raise ValueError(f"found str for int in window init | line {current_index} in {current_source} | found str for int")
-
-                        screen = pygame.display.set_mode((parsed1[0], parsed2[0]), pygame.RESIZABLE)
-                    
+                        return (opWindowInit, operand(args[1]), operand(args[2]))
                     case "draw":
                         match args[1]:
                             case "line":
-                                # Ensure there are enough arguments for line command
                                 if len(args) < 10:
-                                    raise ValueError(f"Insufficient arguments for window draw line | line {current_index} in {current_source}")
-                                
-                                # Check if screen is initialized
-                                if screen is None:
-                                    raise ValueError(f"Screen not initialized before drawing | line {current_index} in {current_source}")
-                                
-                                x1 = parseValue(args[2])
-                                y1 = parseValue(args[3])
-                                x2 = parseValue(args[4])
-                                y2 = parseValue(args[5])
-                                
-                                r = parseValue(args[6])
-                                g = parseValue(args[7])
-                                b = parseValue(args[8])
-                                
-                                thickness = parseValue(args[9])
-
-                                for val in [x1, x2, y1, y2, r, g, b, thickness]: 
-                                    if val[1] not in ["var int", "literal int"]: 
-                                        raise ValueError(f"found str for int | line {current_index} in {current_source} |") 
-
-                                pygame.draw.line(screen, (r[0], g[0], b[0]), (x1[0], y1[0]), (x2[0], y2[0]), thickness[0])
-                            
+                                    return (opFail, lambda: ValueError(f"Insufficient arguments for window draw line | line {current_index} in {current_source}"))
+                                return (opDrawLine, [operand(args[k]) for k in range(2, 10)])
                             case "rect":
                                 # Expected: window draw rect <x1> <y1> <x2> <y2> <r> <g> <b>
                                 if len(args) < 8:
-                                    raise ValueError(f"Insufficient arguments for window draw rect | line {current_index} in {current_source}")
-                                
-                                if screen is None:
-                                    raise ValueError(f"Screen not initialized before drawing | line {current_index} in {current_source}")
-                                
-                                x1 = parseValue(args[2])
-                                y1 = parseValue(args[3])
-                                x2 = parseValue(args[4])
-                                y2 = parseValue(args[5])
-                                
-                                r = parseValue(args[6])
-                                g = parseValue(args[7])
-                                b = parseValue(args[8])
-
-                                for val in [x1, x2, y1, y2, r, g, b]: 
-                                    if val[1] not in ["var int", "literal int"]: 
-                                        raise ValueError(f"found str for int | line {current_index} in {current_source} |") 
-
-
-                                # Calculate the top-left coordinates and dimensions
-                                rect_x = min(x1[0], x2[0])
-                                rect_y = min(y1[0], y2[0])
-                                rect_width = abs(x2[0] - x1[0])
-                                rect_height = abs(y2[0] - y1[0])
-                                
-                                pygame.draw.rect(screen, (r[0], g[0], b[0]), (rect_x, rect_y, rect_width, rect_height))
-
+                                    return (opFail, lambda: ValueError(f"Insufficient arguments for window draw rect | line {current_index} in {current_source}"))
+                                return (opDrawRect, [operand(args[k]) for k in range(2, 9)])
                     case "update":
-                        windowQuit = False
-                        for event in pygame.event.get():
-                            if event.type == pygame.QUIT:
-                                windowQuit = True
-                        
+                        return (opWindowUpdate,)
                     case "flip":
-                        pygame.display.flip()
-                    
+                        return (opFlip,)
                     case "fill":
-                        r = parseValue(args[1])
-                        g = parseValue(args[2])
-                        b = parseValue(args[3])
+                        return (opFill, [operand(args[k]) for k in range(1, 4)])
+                    case "event":
+                        if args[1] == "quit":
+                            return (opEventQuit, args[2])
+                    case "quit":
+                        return (opWindowQuit,)
+            case "import":
+                return (opImport, args)
+            case "end":
+                return (opEnd,)
+        # unknown commands (comments, endfunc, ...) do nothing
+        return (opNop,)
+
+    def load(lines, source):
+        tokens = [tokenize(line) for line in lines]
+        code = []
+        for index, parsed in enumerate(tokens):
+            try:
+                code.append(decode(parsed, index, tokens, lines, source))
+            except Exception as e:
+                # malformed lines only fail if they are reached, like before
+                code.append((opFail, lambda e=e: e))
+        return code
+
+    # ===== instructions =====
+    # a handler returns None to go on with the next line or the index to jump to
+
+    def opNop(ins):
+        pass
+
+    def opFail(ins):
+        raise ins[1]()
+
+    def opPrint(ins):
+        out = "".join(str(value(o)) for o in ins[1])
+        if ins[2]:
+            print(out.strip(), flush=1, end='\r')
+        else:
+            print(out.strip())
+
+    def opRnd(ins):
+        args = ins[1]
+        match args[0]:
+            case "int":
+                parsed1 = parseValue(args[1], variables)
+                origin = parseValue(args[2])
+                stop = parseValue(args[3])
+                if parsed1[1] not in ["var int", "var str"]:
+                    raise NameError(f"Can not assign a random int value to a literal on line {current_index} in {current_source}")
+                if origin[1] not in ["literal int", "var int"] or stop[1] not in ["literal int", "var int"]:
+                    raise ValueError(f"origin | stop has to be a int for a random int genreation on line {current_index} in {current_source}")
+
+                variables[args[1]] = random.randint(origin[0], stop[0])
+
+            case "str":
+                parsed1 = parseValue(args[1])
+                length = parseValue(args[2])
+                if parsed1[1] not in ["var int", "var str"]:
+                    raise NameError(f"Can not assign a random string value to a literal on line {current_index} in {current_source}")
+                if length[1] not in ["literal int", "var int"]:
+                    raise ValueError(f"length has to be a int for a random str genreation on line {current_index} in {current_source}")
+
+                _ = ""
+                for i in range(length[0]): _ += string.printable[random.randint(0, len(string.printable) - 1)]
+                variables[args[1]] = _
+
+    def opPython(ins):
+        safeExec(ins[1], current_source)
+
+    def opItrables(ins):
+        args = ins[1]
+        match args[0]:
+            case "new":
+                parsed1 = parseValue(args[2])
+                if parsed1[1] not in ["array", "dict", "list"]:
+                    raise ValueError("Can not set a itrable to a constant value")
+                variables[args[1]] = parsed1[0]
+
+            case "do":
+                # Binary operation: var math <operand1> <op> <operand2> = <target>
+                if len(args) == 6 and args[4] == "=":
+                    parsed1 = parseValue(args[1])
+                    parsed2 = parseValue(args[3])
+                    op = args[2]
+                    # Check if both operands are ints...
+                    if parsed1[1] in ["itralbe array", "itralbe list"] and parsed2[1] in ["var int", "literal int", "itralbe array", "itralbe list", "itralbe dict", "var str", "literal str"]:
+                        value1 = parsed1[0]
+                        value2 = parsed2[0]
+                        match op:
+                            case "append": result = value1.append(value2)
+                            case "pop": result = value1.pop(value2)
+                            case "*": result = value1 * value2
+                            case "//": result = value1 // value2
+                            case "/": result = value1 / value2
+                            case "**": result = value1 ** value2
+                            case "&": result = value1 & value2
+                            case "|": result = value1 | value2
+                            case "^": result = value1 ^ value2
+                            case "==": result = 1 if value1 == value2 else 0
+                            case "!=": result = 1 if value1 != value2 else 0
+                            case ">=": result = 1 if value1 >= value2 else 0
+                            case "<=": result = 1 if value1 <= value2 else 0
+                            case ">": result = 1 if value1 > value2 else 0
+                            case "<": result = 1 if value1 < value2 else 0
+                            case "and": result = 1 if value1 and value2 else 0
+                            case "or": result = 1 if value1 or value2 else 0
+                            case _:
+                                raise ValueError(f"On line {current_index} in {current_source}: Unsupported operator '{op}' for int operands.")
+                        variables[args[5]] = float(result)
+                    # Both operands are strings
+                    elif parsed1[1] in ["var str", "literal str"] and parsed2[1] in ["var str", "literal str"]:
+                        if op not in ["+", "==", "!="]:
+                            raise ValueError(f"On line {current_index} in {current_source}: For string operands, only '+', '==' and '!=' are allowed.")
+                        if op == "+":
+                            variables[args[5]] = parsed1[0] + parsed2[0]
+                        elif op == "==":
+                            variables[args[5]] = 1 if parsed1[0] == parsed2[0] else 0
+                        elif op == "!=":
+                            variables[args[5]] = 1 if parsed1[0] != parsed2[0] else 0
+                    else:
+                        raise ValueError(f"On line {current_index} in {current_source}: Mixing types is not allowed in binary math.")
+                # Mono-operation: var math <operand> <op> = <target>
+                elif len(args) == 5 and args[3] == "=":
+                    parsed1 = parseValue(args[1])
+                    op = args[2]
+                    if parsed1[1] in ["var int", "literal int"]:
+                        value1 = parsed1[0]
+                        match op:
+                            case "sqrt": result = value1 ** 0.5
+                            case "cbrt": result = value1 ** (1/3)
+                            case "~": result = ~value1
+                            case "not": result = 0 if value1 else 1
+                            case "tan": result = math.tan(value1)
+                            case "sin": result = math.sin(value1)
+                            case "cos": result = math.cos(value1)
+                            case _:
+                                raise ValueError(f"On line {current_index} in {current_source}: Unsupported operator '{op}' for int operand.")
+                        variables[args[4]] = float(result)
+                    elif parsed1[1] in ["var str", "literal str"]:
+                        if op != "not":
+                            raise ValueError(f"On line {current_index} in {current_source}: For string operand, only 'not' is allowed.")
+                        # For a string: non-empty is True -> convert to 0; empty is False -> convert to 1.
+                        variables[args[4]] = 0 if parsed1[0] else 1
+                    else:
+                        raise ValueError(f"On line {current_index} in {current_source}: Invalid operand type in mono math.")
+                else:
+                    raise ValueError(f"On line {current_index} in {current_source}: Invalid math syntax.")
+            case "set":
+                if args[2] != "=":
+                    raise SyntaxError(f"= not found in | line {current_index} in {current_source} | syntax error")
+                parsed1 = parseValue(args[1])
+                parsed2 = parseValue(args[3])
+                if parsed1[1] not in ["var str", "var int"]:
+                    raise ValueError(f"On line {current_index} in {current_source}: Invalid var name, variable not found")
+                variables[args[1]] = parsed2[0]
+
+    def opVarNew(ins):
+        variables[ins[1]] = value(ins[2])
+
+    def opVarSet(ins):
+        target = ins[1]
+        if not isinstance(variables.get(target), (int, float, str)):
+            parseValue(target)  # unknown names fail here, as before
+            raise ValueError(f"On line {current_index} in {current_source}: Invalid var name, variable not found")
+        variables[target] = value(ins[2])
+
+    def opMath2(ins):
+        _, a, op, b, target, fn = ins
+        value1 = value(a)
+        value2 = value(b)
+        if isinstance(value1, NUMBER) and isinstance(value2, NUMBER):
+            if fn is None:
+                raise ValueError(f"On line {current_index} in {current_source}: Unsupported operator '{op}' for int operands.")
+            variables[target] = float(fn(value1, value2))
+        # Both operands are strings
+        elif isinstance(value1, str) and isinstance(value2, str):
+            if op not in ["+", "==", "!="]:
+                raise ValueError(f"On line {current_index} in {current_source}: For string operands, only '+', '==' and '!=' are allowed.")
+            if op == "+":
+                variables[target] = value1 + value2
+            elif op == "==":
+                variables[target] = 1 if value1 == value2 else 0
+            else:
+                variables[target] = 1 if value1 != value2 else 0
+        else:
+            raise ValueError(f"On line {current_index} in {current_source}: Mixing types is not allowed in binary math.")
+
+    def opMath1(ins):
+        _, a, op, target, fn = ins
+        value1 = value(a)
+        if isinstance(value1, NUMBER):
+            if fn is None:
+                raise ValueError(f"On line {current_index} in {current_source}: Unsupported operator '{op}' for int operand.")
+            variables[target] = float(fn(value1))
+        elif isinstance(value1, str):
+            if op != "not":
+                raise ValueError(f"On line {current_index} in {current_source}: For string operand, only 'not' is allowed.")
+            # For a string: non-empty is True -> convert to 0; empty is False -> convert to 1.
+            variables[target] = 0 if value1 else 1
+        else:
+            raise ValueError(f"On line {current_index} in {current_source}: Invalid operand type in mono math.")
+
+    def opWhileBegin(ins):
+        whileLoops.append(current_index)
+
+    def opWhileEnd(ins):
+        if not whileLoops:
+            raise SyntaxError(f"Unexpected while end with no matching begin | line {current_index} in {current_source}")
+        condition = value(ins[1])
+        lastLoopIndex = whileLoops.pop()
+        if condition:
+            return lastLoopIndex
+
+    def opIfBegin(ins):
+        if not value(ins[1]):
+            # skip past the matching if end, found at load time
+            return ins[2] + 1
+
+    def opDef(ins):
+        _, func_name, num_args, start_index, end_index = ins
+        if num_args[0] != LITERAL or not isinstance(num_args[1], NUMBER):
+            if num_args[0] == NAME:
+                parseValue(num_args[1])
+            raise SyntaxError(f"invalid function syntax | line {current_index} in {current_source} |")
+        if end_index is None:
+            raise ValueError(f"Function {func_name} has no return statement.")
+        functionIndexs[current_source][func_name] = (start_index, num_args[1], end_index)
+        # resumes at the return line, like before
+        return end_index
+
+    def opReturn(ins):
+        global current_source, current_lines, code
+        variables["return"] = value(ins[1])
+        if functionStack:
+            current_source, index = functionStack.pop()
+            current_lines = sources[current_source]
+            code = programs[current_source]
+            return index
+
+    def opCall(ins):
+        global current_source, current_lines, code
+        _, func_name, args = ins
+        found = None
+
+        # Search all sources for the function
+        for source_id, funcs in functionIndexs.items():
+            if func_name in funcs:
+                found = (source_id, funcs[func_name])
+                break
 
-                        for val in [r, g, b]: 
-                            if val[1] not in ["var int", "literal int"]: 
-                                raise ValueError(f"found str for int | line {current_index} in {current_source} |") 
+        if not found:
+            raise ValueError(f"Function {func_name} not defined | line {current_index} in {current_source}")
 
+        target_source, (start_index, num_args, end_index) = found
 
-                        screen.fill((r[0], g[0], b[0]))
+        if len(args) != num_args:
+            raise ValueError(f"Function {func_name} expects {num_args} arguments, got {len(args)} | line {current_index} in {current_source}")
 
+        # Set up arguments
+        for name, arg in args:
+            variables[name] = value(arg)
 
-                    case "event":
-                        match args[1]:
-                            case "quit":
-                                parsed1 = parseValue(args[2])
-
-                                if parsed1[1] not in ["var int", "var str"]:
-                                    raise ValueError(f"can not assign event value to literal | line {current_index} in {current_source} | found literla for var")
-                                
-                                variables[args[2]] = windowQuit
-                
-                    case "quit":
-                        pygame.quit()
+        # Save current position to return to
+        functionStack.append((current_source, current_index + 1))
 
-            case "import":
-                parsed1 = parseValue(args[0])
-                # Store imported file lines
-                file_path = parsed1[0]
-                imported_lines = open(file_path, "r").readlines()
-                sources[file_path] = imported_lines
-
-                # Index the functions
-                allowedFunctionsNames = []
-                fileFunctions = {}
-
-                for line_num, line in enumerate(imported_lines):
-                    parsed = tokenize(line)
-                    if not parsed:
-                        continue
-
-                    cmd = parsed[0]
-                    args = parsed[1:]
-
-                    match cmd:
-                        case "export":
-                            if args[0] == "functions":
-                                for token in args[1:]:
-                                    allowedFunctionsNames.append(token)
-                        case "def":
-                            func_name = args[0]
-                            num_args = parseValue(args[1])
-                            if num_args[1] != "literal int":
-                                raise SyntaxError(f"invalid function syntax | during importing {file_path} | line {line_num}")
-                            num_args = num_args[0]
-                            start_index = line_num + 1
-
-                            end_index = None
-                            for j in range(start_index, len(imported_lines)):
-                                tokens = tokenize(imported_lines[j])
-                                if tokens and tokens[0] == "return":
-                                    end_index = j
-                                    break
-                            if end_index is None:
-                                raise ValueError(f"Function {func_name} has no return statement in {file_path}")
-                            fileFunctions[func_name] = (start_index, num_args, end_index)
-
-                # Store only allowed functions
-                functionIndexs[file_path] = {}
-                for name in allowedFunctionsNames:
-                    if name in fileFunctions:
-                        functionIndexs[file_path][name] = fileFunctions[name]
-                    else:
-                        raise ImportError(f"namespace {file_path} does not export function {name}")
-            case "end":
-                print("\nProgram ended")
-                input("")
-                exit(0)
+        # Switch to called function
+        current_source = target_source
+        current_lines = sources[current_source]
+        code = programs[current_source]
+        return start_index
+
+    def opDelay(ins):
+        seconds = value(ins[1])
+        if isinstance(seconds, NUMBER):
+            time.sleep(seconds)
+        else:
+            raise ValueError(f"On line {current_index} in {current_source}: delay value must be an int")
+
+    def opInput(ins):
+        args = ins[1]
+        parsed1 = parseValue(args[0])
+        parsed2 = parseValue(args[1])
+        if parsed1[1] not in ["var str", "literal str"]:
+            raise ValueError(f"On line {current_index} in {current_source}: prompt string must be a string")
+        if parsed2[1] not in ["var str", "var int"]:
+            raise ValueError(f"On line {current_index} in {current_source}: target variable must be a variable")
+        variables[args[1]] = input(parsed1[0])
+
+    def opConvert(ins):
+        args = ins[1]
+        parsed1 = parseValue(args[0])
+        parsed2 = parseValue(args[1])
+        if parsed2[1] not in ["var str", "var int"]:
+            raise ValueError(f"On line {current_index} in {current_source}: target variable not found or is not a convertable type of [int -> str, str -> int]")
+        if isinstance(parsed1[0], float) or isinstance(parsed1[0], int):
+            variables[args[1]] = str(parsed1[0])
+        elif isinstance(parsed1[0], str):
+            try:
+                variables[args[1]] = float(parsed1[0])
+            except ValueError:
+                raise ValueError(f"wrong format str convert int value | line {current_index} in {current_source} | int convert error")
+
+    def numbers(operands):
+        values = [value(o) for o in operands]
+        for val in values:
+            if not isinstance(val, NUMBER):
+                raise ValueError(f"found str for int | line {current_index} in {current_source} |")
+        return values
+
+    def opWindowInit(ins):
+        global screen
+        width, height = value(ins[1]), value(ins[2])
+        if not isinstance(width, NUMBER) or not isinstance(height, NUMBER):
+            raise ValueError(f"found str for int in window init | line {current_index} in {current_source} | found str for int")
+
+        screen = render.open_window(width, height)
+
+    def opDrawLine(ins):
+        # Check if screen is initialized
+        if screen is None:
+            raise ValueError(f"Screen not initialized before drawing | line {current_index} in {current_source}")
+        x1, y1, x2, y2, r, g, b, thickness = numbers(ins[1])
+        screen.line((r, g, b), (x1, y1), (x2, y2), thickness)
+
+    def opDrawRect(ins):
+        if screen is None:
+            raise ValueError(f"Screen not initialized before drawing | line {current_index} in {current_source}")
+        x1, y1, x2, y2, r, g, b = numbers(ins[1])
+        # Calculate the top-left coordinates and dimensions
+        rect_x = min(x1, x2)
+        rect_y = min(y1, y2)
+        rect_width = abs(x2 - x1)
+        rect_height = abs(y2 - y1)
+
+        screen.rect((r, g, b), (rect_x, rect_y, rect_width, rect_height))
+
+    def opWindowUpdate(ins):
+        global windowQuit
+        windowQuit = screen is not None and screen.quit_requested()
+
+    def opFlip(ins):
+        if screen is None:
+            raise ValueError(f"Screen not initialized before drawing | line {current_index} in {current_source}")
+        # the frame's draw commands reach the backend here, in one batch
+        screen.flip()
+
+    def opFill(ins):
+        if screen is None:
+            raise ValueError(f"Screen not initialized before drawing | line {current_index} in {current_source}")
+        r, g, b = numbers(ins[1])
+        screen.fill((r, g, b))
+
+    def opEventQuit(ins):
+        parsed1 = parseValue(ins[1])
+
+        if parsed1[1] not in ["var int", "var str"]:
+            raise ValueError(f"can not assign event value to literal | line {current_index} in {current_source} | found literla for var")
+
+        variables[ins[1]] = windowQuit
+
+    def opWindowQuit(ins):
+        if screen is not None:
+            screen.close()
+        elif pygame is not None:
+            pygame.quit()
+
+    def opImport(ins):
+        args = ins[1]
+        parsed1 = parseValue(args[0])
+        # Store imported file lines
+        file_path = parsed1[0]
+        imported_lines = open(file_path, "r").readlines()
+        sources[file_path] = imported_lines
+        programs[file_path] = load(imported_lines, file_path)
+
+        # Index the functions
+        allowedFunctionsNames = []
+        fileFunctions = {}
+
+        for line_num, line in enumerate(imported_lines):
+            parsed = tokenize(line)
+            if not parsed:
+                continue
+
+            cmd = parsed[0]
+            args = parsed[1:]
+
+            match cmd:
+                case "export":
+                    if args[0] == "functions":
+                        for token in args[1:]:
+                            allowedFunctionsNames.append(token)
+                case "def":
+                    func_name = args[0]
+                    num_args = parseValue(args[1])
+                    if num_args[1] != "literal int":
+                        raise SyntaxError(f"invalid function syntax | during importing {file_path} | line {line_num}")
+                    num_args = num_args[0]
+                    start_index = line_num + 1
+
+                    end_index = None
+                    for j in range(start_index, len(imported_lines)):
+                        tokens = tokenize(imported_lines[j])
+                        if tokens and tokens[0] == "return":
+                            end_index = j
+                            break
+                    if end_index is None:
+                        raise ValueError(f"Function {func_name} has no return statement in {file_path}")
+                    fileFunctions[func_name] = (start_index, num_args, end_index)
+
+        # Store only allowed functions
+        functionIndexs[file_path] = {}
+        for name in allowedFunctionsNames:
+            if name in fileFunctions:
+                functionIndexs[file_path][name] = fileFunctions[name]
+            else:
+                raise ImportError(f"namespace {file_path} does not export function {name}")
+
+    def opEnd(ins):
+        print("\nProgram ended")
+        input("")
+        exit(0)
+
+    current_source = "main"
+    current_lines = sources[current_source]
+    programs = {"main": load(current_lines, "main")}
+    code = programs[current_source]
+    current_index = 0
+
+    while True:
+        if current_index >= len(code):
+            if functionStack:
+                # Return to caller if stack isn't empty
+                current_source, current_index = functionStack.pop()
+                current_lines = sources[current_source]
+                code = programs[current_source]
+                continue
+            else:
+                break
 
-        current_index += 1
+        ins = code[current_index]
+        jump = ins[0](ins)
+        current_index = current_index + 1 if jump is None else jump
 
 
     print("\nProgram ended")
@@ -0,0 +1,211 @@
+"""
+Rendering for the ver0.6 window commands.
+
+Draw commands are recorded into a display list and handed to the backend in one batch
+when the frame is flipped, so the interpreter never calls into the graphics library
+once per primitive. Backends:
+
+    pygame    a real window (also works under SDL_VIDEODRIVER=dummy)
+    headless  an in-memory RGB framebuffer, needs no pygame at all
+
+The backend is picked with $ROS_RENDER; by default pygame, or headless when pygame
+can not be imported.
+"""
+import os
+from array import array
+
+FILL, LINE, RECT = 0, 1, 2
+
+
+class PygameBackend:
+    def __init__(self):
+        import pygame
+        self.pygame = pygame
+        self.surface = None
+
+    def open(self, width, height):
+        self.surface = self.pygame.display.set_mode((width, height), self.pygame.RESIZABLE)
+
+    def draw(self, commands):
+        surface = self.surface
+        line = self.pygame.draw.line
+        rect = self.pygame.draw.rect
+        for cmd in commands:
+            kind = cmd[0]
+            if kind == LINE:
+                line(surface, cmd[1], cmd[2], cmd[3], cmd[4])
+            elif kind == RECT:
+                rect(surface, cmd[1], cmd[2])
+            else:
+                surface.fill(cmd[1])
+
+    def present(self):
+        self.pygame.display.flip()
+
+    def quit_requested(self):
+        quit = False
+        for event in self.pygame.event.get():
+            if event.type == self.pygame.QUIT:
+                quit = True
+        return quit
+
+    def close(self):
+        self.pygame.quit()
+
+
+class HeadlessBackend:
+    def __init__(self):
+        self.width = self.height = 0
+        # one 0xRRGGBB int per pixel, row by row
+        self.pixels = array("I")
+        self.frames = 0
+
+    def open(self, width, height):
+        self.width, self.height = int(width), int(height)
+        self.pixels = array("I", bytes(4 * self.width * self.height))
+
+    def draw(self, commands):
+        for cmd in commands:
+            kind = cmd[0]
+            if kind == LINE:
+                self.line(cmd[1], cmd[2], cmd[3], cmd[4])
+            elif kind == RECT:
+                self.rect(cmd[1], cmd[2])
+            else:
+                self.pixels = array("I", [rgb(cmd[1])]) * (self.width * self.height)
+
+    def present(self):
+        self.frames += 1
+
+    def quit_requested(self):
+        return False
+
+    def close(self):
+        pass
+
+    def get_at(self, x, y):
+        c = self.pixels[y * self.width + x]
+        return (c >> 16, (c >> 8) & 0xFF, c & 0xFF)
+
+    def save_ppm(self, path):
+        with open(path, "wb") as f:
+            f.write(b"P6 %d %d 255\n" % (self.width, self.height))
+            f.write(bytes(b for c in self.pixels for b in (c >> 16, (c >> 8) & 0xFF, c & 0xFF)))
+
+    def rect(self, color, area):
+        x, y, w, h = (int(v) for v in area)
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + w, self.width), min(y + h, self.height)
+        if x1 >= x2 or y1 >= y2:
+            return
+        row = array("I", [rgb(color)]) * (x2 - x1)
+        for yy in range(y1, y2):
+            start = yy * self.width + x1
+            self.pixels[start:start + len(row)] = row
+
+    def line(self, color, start, end, width):
+        if width < 1:
+            return
+        clipped = clip(start[0], start[1], end[0], end[1], self.width - 1, self.height - 1)
+        if clipped is None:
+            return
+        x1, y1, x2, y2 = (int(round(v)) for v in clipped)
+        color = rgb(color)
+        pixels, w, h = self.pixels, self.width, self.height
+        dx, dy = abs(x2 - x1), abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        # thick lines are drawn as parallel lines shifted along the minor axis, like pygame
+        for offset in range(-((width - 1) // 2), width // 2 + 1):
+            x, y = (x1 + offset, y1) if dy > dx else (x1, y1 + offset)
+            err = dx - dy
+            for _ in range(max(dx, dy) + 1):
+                if 0 <= x < w and 0 <= y < h:
+                    pixels[y * w + x] = color
+                e2 = 2 * err
+                if e2 > -dy:
+                    err -= dy
+                    x += sx
+                if e2 < dx:
+                    err += dx
+                    y += sy
+
+
+def rgb(color):
+    r, g, b = (max(0, min(255, int(c))) for c in color[:3])
+    return (r << 16) | (g << 8) | b
+
+
+def clip(x1, y1, x2, y2, xmax, ymax):
+    # Liang-Barsky against [0, xmax] x [0, ymax], so far off-screen lines cost nothing
+    dx, dy = x2 - x1, y2 - y1
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x1), (dx, xmax - x1), (-dy, y1), (dy, ymax - y1)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            if t > t1:
+                return None
+            t0 = max(t0, t)
+        else:
+            if t < t0:
+                return None
+            t1 = min(t1, t)
+    return x1 + t0 * dx, y1 + t0 * dy, x1 + t1 * dx, y1 + t1 * dy
+
+
+BACKENDS = {"pygame": PygameBackend, "headless": HeadlessBackend}
+
+
+def backend(name=None):
+    name = name or os.environ.get("ROS_RENDER")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"unknown render backend {name!r}, expected one of {', '.join(BACKENDS)}")
+        return BACKENDS[name]()
+    try:
+        return PygameBackend()
+    except ImportError:
+        return HeadlessBackend()
+
+
+class Renderer:
+    """A window: draw calls go into `commands` until flip() hands them to the backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.commands = []
+
+    def open(self, width, height):
+        self.backend.open(width, height)
+        return self
+
+    def fill(self, color):
+        # nothing drawn earlier in the frame would survive the fill
+        self.commands.clear()
+        self.commands.append((FILL, color))
+
+    def line(self, color, start, end, width):
+        self.commands.append((LINE, color, start, end, width))
+
+    def rect(self, color, area):
+        self.commands.append((RECT, color, area))
+
+    def flip(self):
+        self.backend.draw(self.commands)
+        self.commands.clear()
+        self.backend.present()
+
+    def quit_requested(self):
+        return self.backend.quit_requested()
+
+    def close(self):
+        self.commands.clear()
+        self.backend.close()
+
+
+def open_window(width, height, name=None):
+    return Renderer(backend(name)).open(width, height)
@@ -1,4 +1,4 @@
-import re, math
+import re, math, functools
 
 base_pattern = re.compile(
     r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|'
@@ -33,7 +33,9 @@ def tokenizeBrackets(s):
                 i += 1
     return tokens
 
-def SafeEval(expr: str, expressionParcer):
+# parsing is memoized by expression text: loop conditions and deltas are the same string every iteration
+@functools.lru_cache(maxsize=4096)
+def parseExpr(expr: str):
     # Tokenize
     tokens = tokenizeBrackets(expr)
 
@@ -158,7 +160,11 @@ def SafeEval(expr: str, expressionParcer):
     while stack:
         pop_op()
 
-    ast = output[0]
+    # nested lists of token strings, shared between calls so never mutated
+    return output[0]
+
+def SafeEval(expr: str, expressionParcer):
+    ast = parseExpr(expr)
 
     # Evaluate AST bottom-up
     def evaluate(node):
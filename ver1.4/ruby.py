@@ -1,14 +1,13 @@
 # ruby.py - full final version (drop-in)
 # Note: big file. Read the notes at the end if something needs tuning.
 
-import subprocess, traceback
 import random, math, re, time
-import string, hashlib
-from requests import get
+import string, hashlib, os
 
 RAW_BASE_URL = 'https://raw.githubusercontent.com/Backmeet/ruby-on-spaces/main'
 
 def getFileText(filePath):
+    from requests import get  # requests is slow to import, only pay for it when fetching
     url = f"{RAW_BASE_URL}/{filePath}"
     try:
         r = get(url, timeout=6)
@@ -23,30 +22,91 @@ def StableHash(text: str, filename: str = ""):
     data = f"{filename}\n{text}".encode('utf-8')
     return hashlib.sha512(data).hexdigest()
 
-stdLibPath = r"gitPath:code-examples/stdlib/stdLib.ru"
-if stdLibPath.startswith("gitPath:"):
+# gitPath: files are looked up in the local checkout, then in the cache, and only then fetched
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+cacheDir = os.environ.get("ROS_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "ruby-on-spaces")
+
+def writeAtomic(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def getCachedFileText(filePath):
+    """
+    Text of a repo file without touching the network when possible.
+    Fetched copies are stored content-addressed under their StableHash in cacheDir/objects,
+    with cacheDir/refs mapping the repo path to that hash; a copy whose hash no longer
+    matches is ignored and fetched again.
+    """
+    local = os.path.join(repoRoot, *filePath.split("/"))
+    if os.path.isfile(local):
+        with open(local, encoding="utf-8", newline="") as f:
+            return f.read()
+    ref = os.path.join(cacheDir, "refs", filePath.replace("/", "__"))
     try:
-        stdLibCode = getFileText(stdLibPath[8:])
-    except Exception:
-        stdLibCode = ""
-else:
+        with open(ref, encoding="utf-8") as f:
+            key = f.read().strip()
+        with open(os.path.join(cacheDir, "objects", key), encoding="utf-8", newline="") as f:
+            text = f.read()
+        if StableHash(text) == key:
+            return text
+    except OSError:
+        pass
+    text = getFileText(filePath)
+    key = StableHash(text)
     try:
-        stdLibCode = open(stdLibPath).read()
-    except Exception:
-        stdLibCode = ""
-stdLibHash = StableHash(stdLibCode)
+        os.makedirs(os.path.join(cacheDir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(cacheDir, "refs"), exist_ok=True)
+        writeAtomic(os.path.join(cacheDir, "objects", key), text)
+        writeAtomic(ref, key)
+    except OSError:
+        pass  # no writable cache, the next run fetches again
+    return text
+
+stdLibPath = r"gitPath:code-examples/stdlib/stdLib.ru"
+stdLib = None  # (code, hash), resolved on first use so importing never waits on the network
+
+def loadStdLib():
+    global stdLib
+    if stdLib is None:
+        if stdLibPath.startswith("gitPath:"):
+            try:
+                code = getCachedFileText(stdLibPath[8:])
+            except Exception:
+                code = ""
+        else:
+            try:
+                code = open(stdLibPath).read()
+            except Exception:
+                code = ""
+        # runRuby hashes a source as its lines joined without line endings, hash the stdlib
+        # the same way so the bound-mode system check matches it whatever its line endings
+        stdLib = (code, StableHash("".join(code.splitlines())))
+    return stdLib
+
+def __getattr__(name):
+    # stdLibCode / stdLibHash used to be computed at import time
+    if name == "stdLibCode":
+        return loadStdLib()[0]
+    if name == "stdLibHash":
+        return loadStdLib()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ---------------------------------
 # evalSafe (simple expression tokenizer + AST builder)
 # ---------------------------------
-import re
+import re, functools
 
-def SafeEval(expr: str, expressionParcer):
+@functools.lru_cache(maxsize=4096)
+def parseSafeExpr(expr: str):
     """
-    Robust SafeEval:
+    Parse an expression for SafeEval, memoized by its text (loop conditions and
+    deltas are the same string every iteration):
     - tokenizes strings, numbers, identifiers, parentheses, bracket-lists, function-call syntax (name(...))
     - constructs AST via shunting-yard, supporting unary ops and parentheses
-    - returns the evaluated value by calling expressionParcer on AST nodes
+    Returns the AST (nested lists of token strings, never mutated) or None for an empty expression.
     """
 
     # tokenizer (char-by-char to properly handle nested structures & quotes)
@@ -284,8 +344,17 @@ def SafeEval(expr: str, expressionParcer):
         pop_op()
 
     if not output:
+        return None
+    return output[0]
+
+def SafeEval(expr: str, expressionParcer):
+    """
+    Robust SafeEval: parses expr (cached, see parseSafeExpr) and
+    returns the evaluated value by calling expressionParcer on AST nodes
+    """
+    ast = parseSafeExpr(expr)
+    if ast is None:
         return 0
-    ast = output[0]
 
     # evaluate ast recursively via expressionParcer
     def evaluate(node):
@@ -308,6 +377,63 @@ def SafeEval(expr: str, expressionParcer):
             raise ValueError("Unexpected AST node in SafeEval")
     return evaluate(ast)
 
+# ---------------------------------
+# Source index (tokens + block jump table, built once per source)
+# ---------------------------------
+comment_re = re.compile(r'\s*//')
+token_re = re.compile(r'''\[[^\]]*\] | "(?:\\.|[^"\\])*" | '(?:\\.|[^'\\])*' | \w+\(.*?\) | \w+ | == | != | >= | <= | // | \*\* | [\+\-\*/%^<>=|&~]''', re.VERBOSE)
+
+def tokenize(line: str):
+    return token_re.findall(comment_re.split(line, maxsplit=1)[0])
+
+def indexSource(lines):
+    """
+    Tokenize every line of a source once and pair each block opener with where it ends.
+    Returns (tokens, ends):
+    - tokens[i] is tokenize(lines[i])
+    - ends[i] for a def/if/while/for line is its matching endfunc/if end/while end/for end
+      (len(lines) when unmatched), for a try line its except, for an except line the next done
+      (None when there is none)
+    """
+    tokens = [tokenize(line) for line in lines]
+    ends = {}
+    open_blocks = {"def": [], "if": [], "while": [], "for": []}
+    pending_try = []
+    pending_except = []
+    for i, toks in enumerate(tokens):
+        if not toks:
+            continue
+        head = toks[0]
+        closing = len(toks) > 1 and toks[1] == "end"
+        if head == "endfunc":
+            if open_blocks["def"]:
+                ends[open_blocks["def"].pop()] = i
+        elif head in ("if", "while", "for"):
+            if closing:
+                if open_blocks[head]:
+                    ends[open_blocks[head].pop()] = i
+            else:
+                open_blocks[head].append(i)
+        elif head == "def":
+            open_blocks["def"].append(i)
+        elif head == "try":
+            pending_try.append(i)
+        elif head == "except":
+            for t in pending_try:
+                ends[t] = i
+            pending_try = []
+            pending_except.append(i)
+        elif head == "done":
+            for e in pending_except:
+                ends[e] = i
+            pending_except = []
+    for stack in open_blocks.values():
+        for i in stack:
+            ends[i] = len(lines)
+    for i in pending_try + pending_except:
+        ends[i] = None
+    return tokens, ends
+
 # ---------------------------------
 # Interpreter
 # ---------------------------------
@@ -325,12 +451,8 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
     sources = {"main": main_code.splitlines()}
     files = {name: content.splitlines() for name, content in source_dict.items()}
 
-    # regex helpers
-    comment_re = re.compile(r'\s*//')
-    token_re = re.compile(r'''\[[^\]]*\] | "(?:\\.|[^"\\])*" | '(?:\\.|[^'\\])*' | \w+\(.*?\) | \w+ | == | != | >= | <= | // | \*\* | [\+\-\*/%^<>=|&~]''', re.VERBOSE)
-
-    def tokenize(line: str):
-        return token_re.findall(comment_re.split(line, maxsplit=1)[0])
+    # every source is tokenized once; lines are never re-tokenized while running
+    indexes = {name: indexSource(lines) for name, lines in sources.items()}
 
     def resolve_list_call(chain):
         """
@@ -371,8 +493,10 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
             return False
 
     # interpreter state
-    variables = {"return": None}
+    variables = {"return": None}  # globals; "return" and the loop jump markers always live here
+    frames = []                   # call stack of per-call locals, innermost last
     functionIndexs = {"main": {}}
+    functionTable = {}            # name -> (src, startIndex, argData), first source in functionIndexs wins
     sources_state = sources  # alias
     current_source = "main"
     current_lines = sources_state[current_source]
@@ -382,6 +506,21 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
     try_state = [False, None, None]  # [in_try, except_line, exception_string]
     bound_mode = initBounded
 
+    def block_end(index):
+        # where the block opened at index ends, paired up once by indexSource
+        return indexes[current_source][1].get(index, len(current_lines))
+
+    def scope():
+        # assignments go to the running call's locals, or to globals at top level
+        return frames[-1] if frames else variables
+
+    def index_functions():
+        # rebuilt whenever a def or import registers functions, so calls never scan sources
+        functionTable.clear()
+        for src, funcs in functionIndexs.items():
+            for name, (startIndex, argData) in funcs.items():
+                functionTable.setdefault(name, (src, startIndex, argData))
+
     # ---------- parseValue (recursive) ----------
     def parseValue(val_str, local_vars=None):
         """
@@ -389,7 +528,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
         type_str one of: literal int/str/list, var int/str/list, func, var unknown
         """
         if local_vars is None:
-            local_vars = variables
+            local_vars = scope()
 
         # If passed non-str (already evaluated), accept directly
         if not isinstance(val_str, str):
@@ -406,7 +545,9 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
         if low == "true":
             return 1, "literal int"
 
-        # variable lookup
+        # variable lookup: locals first, then globals
+        if vs not in local_vars:
+            local_vars = variables
         if vs in local_vars:
             v = local_vars[vs]
             if isinstance(v, list): return v, "var list"
@@ -430,9 +571,8 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
             return evaluated, "literal list"
 
         # function references (registered)
-        for src, funcs in functionIndexs.items():
-            if vs in funcs:
-                return (src, vs), "func"
+        if vs in functionTable:
+            return (functionTable[vs][0], vs), "func"
 
         # not found
         raise NameError(f"Unknown value '{vs}' at {current_source}:{current_index}")
@@ -588,19 +728,15 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
         """
         Runs a function synchronously and returns its 'return' value.
         Function metadata stored as functionIndexs[src][name] = (startIndex, [numArgs, argName1,...])
-        Search for function in current source, then across sources.
+        and looked up through functionTable.
+        The call gets its own frame: arguments and assignments are locals of the call,
+        reads fall back to globals, and the body runs with its own source/line position.
         """
-        # find function
-        found = None
-        found_src = None
-        for src, funcs in functionIndexs.items():
-            if func_name in funcs:
-                found = funcs[func_name]
-                found_src = src
-                break
+        nonlocal current_source, current_lines, current_index
+        found = functionTable.get(func_name)
         if not found:
             raise NameError(f"Function '{func_name}' not defined (call at {current_source}:{current_index})")
-        startIndex, argData = found
+        found_src, startIndex, argData = found
         numArgs = argData[0]
         argNames = argData[1:]
         if len(arg_values) != numArgs:
@@ -610,58 +746,52 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
         saved_source = current_source
         saved_lines = current_lines
         saved_index = current_index
-        saved_vars = variables.copy()
+        saved_loops = (len(while_stack), len(for_stack))
 
         # Prepare function frame
-        # Put args into variables by their names
-        for i, name in enumerate(argNames):
-            variables[name] = arg_values[i]
-
-        # Execute function body from startIndex until matching endfunc
-        # We'll execute by iterating lines starting startIndex until endfunc at same nesting level
-        depth = 0
-        i = startIndex
-        ret_val = None
-        # Local while to execute lines with same processing logic (we call process_line)
-        while i < len(sources_state[found_src]):
-            ln = sources_state[found_src][i]
-            toks = tokenize(ln)
-            if toks:
-                if toks[0] == "def":
-                    depth += 1
-                elif toks[0] == "endfunc":
-                    if depth == 0:
+        frames.append(dict(zip(argNames, arg_values)))
+        current_source = found_src
+        current_lines = sources_state[found_src]
+        current_index = startIndex
+        body_tokens = indexes[found_src][0]
+        try:
+            # Execute function body from startIndex until its endfunc (nested defs are skipped by process_line)
+            while current_index < len(current_lines):
+                toks = body_tokens[current_index]
+                if toks:
+                    if toks[0] == "endfunc":
                         # function end reached
                         break
+                    elif toks[0] == "return":
+                        # evaluate return expression (if provided)
+                        if len(toks) > 1:
+                            expr = " ".join(toks[1:])
+                            # use SafeEval but math_parcer must be able to resolve nested calls; it does via execute_function_call
+                            variables["return"] = SafeEval(expr, math_parcer_wrapper)
+                        else:
+                            variables["return"] = None
+                        break
                     else:
-                        depth -= 1
-                elif toks[0] == "return":
-                    # evaluate return expression (if provided)
-                    if len(toks) > 1:
-                        expr = " ".join(toks[1:])
-                        # use SafeEval but math_parcer must be able to resolve nested calls; it does via execute_function_call
-                        rv = SafeEval(expr, math_parcer_wrapper)
-                        variables["return"] = rv
-                    else:
-                        variables["return"] = None
-                    # when return encountered we stop executing function and restore
-                    ret_val = variables.get("return", None)
-                    break
-                else:
-                    # process other line in function body via process_line function
-                    process_line(toks, ln, in_function=True, source=found_src, local_index=i)
-            i += 1
-
-        # restore caller state (but keep variables mutated by function? we'll follow global variable model: function can mutate globals)
-        # we restore current_source/current_lines/current_index; variables remain as is except we restore caller's non-local names?
-        # To keep semantics simple: function arguments and any local vars remain in variables (like globals)
-        # But we must restore current_source/lines/index
-        # We restore to caller's position (saved_index) after finishing
-        # Return value:
-        ret = variables.get("return", None)
+                        # process other line in function body via process_line function
+                        process_line(toks, current_lines[current_index], in_function=True, source=found_src, local_index=current_index)
+                        # loops jump the same way they do at top level
+                        if "_while_return_index" in variables:
+                            current_index = variables.pop("_while_return_index") + 1
+                            continue
+                        if "_for_return_index" in variables:
+                            current_index = variables.pop("_for_return_index") + 1
+                            continue
+                current_index += 1
+        finally:
+            # drop the frame and any loops a return left open, then resume the caller
+            frames.pop()
+            del while_stack[saved_loops[0]:]
+            del for_stack[saved_loops[1]:]
+            current_source = saved_source
+            current_lines = saved_lines
+            current_index = saved_index
 
-        # restore program counter (outer loop manages it), but variables remain (like your original)
-        return ret
+        return variables.get("return", None)
 
     def _split_args(args_str: str) -> list:
         """
@@ -816,11 +946,11 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                     varname = args[1]
                     origin = parseValue(args[2])[0]
                     stop = parseValue(args[3])[0]
-                    variables[varname] = random.randint(int(origin), int(stop))
+                    scope()[varname] = random.randint(int(origin), int(stop))
                 elif len(args) >= 1 and args[0] == "str":
                     varname = args[1]
                     length = int(parseValue(args[2])[0])
-                    variables[varname] = "".join(string.printable[random.randint(0, len(string.printable)-1)] for _ in range(length))
+                    scope()[varname] = "".join(string.printable[random.randint(0, len(string.printable)-1)] for _ in range(length))
 
             case "var":
                 # var <var> = <expression>
@@ -831,7 +961,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                 varname = varname.strip()
                 # evaluate expression via SafeEval
                 val = SafeEval(expr.strip(), math_parcer_wrapper)
-                variables[varname] = val
+                scope()[varname] = val
 
             case "list":
                 if not args:
@@ -910,21 +1040,9 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                         arglist = [x.strip() for x in arglist_token.split(" ") if x.strip()]
                 # store function metadata (start index is next line)
                 functionIndexs.setdefault(current_source, {})[fname] = (current_index + 1, [len(arglist)] + arglist)
+                index_functions()
                 # skip forward to matching endfunc
-                depth = 0
-                j = current_index + 1
-                while j < len(current_lines):
-                    toks = tokenize(current_lines[j])
-                    if toks:
-                        if toks[0] == "def":
-                            depth += 1
-                        elif toks[0] == "endfunc":
-                            if depth == 0:
-                                break
-                            else:
-                                depth -= 1
-                    j += 1
-                current_index = j
+                current_index = block_end(current_index)
 
             case "endfunc":
                 # end of function when running top-level; nothing to do (function bodies skipped at definition time)
@@ -949,19 +1067,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                     cond_result = SafeEval(cond_expr, math_parcer_wrapper)
                     if not cond_result:
                         # skip to matching if end
-                        depth = 1
-                        j = current_index + 1
-                        while j < len(current_lines):
-                            toks = tokenize(current_lines[j])
-                            if toks:
-                                if toks[0] == "if" and not (len(toks) > 1 and toks[1] == "end"):
-                                    depth += 1
-                                elif toks[0] == "if" and len(toks) > 1 and toks[1] == "end":
-                                    depth -= 1
-                                    if depth == 0:
-                                        break
-                            j += 1
-                        current_index = j
+                        current_index = block_end(current_index)
 
             case "while":
                 if args and args[0] == "end":
@@ -981,19 +1087,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                     cond_expr = " ".join(args)
                     if not SafeEval(cond_expr, math_parcer_wrapper):
                         # skip block
-                        depth = 1
-                        j = current_index + 1
-                        while j < len(current_lines):
-                            toks = tokenize(current_lines[j])
-                            if toks:
-                                if toks[0] == "while" and not (len(toks) > 1 and toks[1] == "end"):
-                                    depth += 1
-                                elif toks[0] == "while" and len(toks) > 1 and toks[1] == "end":
-                                    depth -= 1
-                                    if depth == 0:
-                                        break
-                            j += 1
-                        current_index = j
+                        current_index = block_end(current_index)
                     else:
                         while_stack.append((current_index, cond_expr))
 
@@ -1012,7 +1106,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                         raise SyntaxError(f"Malformed for begin parts at {current_source}:{begin_index}")
                     varname, initVal, conditionExpr, deltaExpr = parts
                     # increment var by delta
-                    variables[varname] = SafeEval(f"{varname} + ({deltaExpr})", math_parcer_wrapper)
+                    scope()[varname] = SafeEval(f"{varname} + ({deltaExpr})", math_parcer_wrapper)
                     if SafeEval(conditionExpr, math_parcer_wrapper):
                         # jump back to begin
                         variables["_for_return_index"] = begin_index
@@ -1028,23 +1122,11 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                     if len(parts) != 4:
                         raise SyntaxError(f"Malformed for begin; need 4 parts at {current_source}:{current_index}")
                     varname, initVal, conditionExpr, deltaExpr = parts
-                    variables[varname] = SafeEval(initVal, math_parcer_wrapper)
+                    scope()[varname] = SafeEval(initVal, math_parcer_wrapper)
                     for_stack.append(current_index)
                     if not SafeEval(conditionExpr, math_parcer_wrapper):
                         # skip loop body
-                        depth = 1
-                        j = current_index + 1
-                        while j < len(current_lines):
-                            toks = tokenize(current_lines[j])
-                            if toks:
-                                if toks[0] == "for" and not (len(toks) > 1 and toks[1] == "end"):
-                                    depth += 1
-                                elif toks[0] == "for" and len(toks) > 1 and toks[1] == "end":
-                                    depth -= 1
-                                    if depth == 0:
-                                        break
-                            j += 1
-                        current_index = j
+                        current_index = block_end(current_index)
 
             case "import":
                 # import "filename"
@@ -1058,11 +1140,13 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                     raise FileNotFoundError(f"Imported file {fname} not found at {current_source}:{current_index}")
                 imported_lines = files[fname]
                 sources_state[fname] = imported_lines
+                if fname not in indexes:
+                    indexes[fname] = indexSource(imported_lines)
+                imported_tokens, imported_ends = indexes[fname]
                 # scan for export/def
                 allowed_funcs = []
                 file_funcs = {}
-                for ln, l in enumerate(imported_lines):
-                    toks = tokenize(l)
+                for ln, toks in enumerate(imported_tokens):
                     if not toks: continue
                     if toks[0] == "export" and len(toks) > 1 and toks[1] == "functions":
                         for tk in toks[2:]:
@@ -1075,20 +1159,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                         arg_names = [x.strip() for x in arg_token.split(",")] if arg_token else []
                         start_idx = ln + 1
                         # find endfunc
-                        depth = 0
-                        eidx = None
-                        for j in range(start_idx, len(imported_lines)):
-                            t2 = tokenize(imported_lines[j])
-                            if t2:
-                                if t2[0] == "def":
-                                    depth += 1
-                                elif t2[0] == "endfunc":
-                                    if depth == 0:
-                                        eidx = j
-                                        break
-                                    else:
-                                        depth -= 1
-                        if eidx is None:
+                        if imported_ends[ln] == len(imported_lines):
                             raise ValueError(f"Function {nm} missing endfunc in import {fname}")
                         file_funcs[nm] = (start_idx, [len(arg_names)] + arg_names)
                 functionIndexs[fname] = {}
@@ -1097,19 +1168,21 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                         functionIndexs[fname][name] = file_funcs[name]
                     else:
                         raise ImportError(f"{fname} does not export {name} at {current_source}:{current_index}")
+                index_functions()
 
             case "export":
                 # handled during import time; top-level export ignored
                 pass
 
             case "system":
-                if not (StableHash("".join(current_lines)) == stdLibHash or not bound_mode):
+                if bound_mode and StableHash("".join(current_lines)) != loadStdLib()[1]:
                     raise PermissionError(f"system disallowed in bound mode at {current_source}:{current_index}")
                 parsed_cmd = parseValue(args[0])
                 if parsed_cmd[1] not in ["var str","literal str"]:
                     raise TypeError(f"system command must be string at {current_source}:{current_index}")
+                import subprocess
                 proc = subprocess.run(parsed_cmd[0], capture_output=1, text=1, shell=1)
-                variables["_stdout"] = proc.stderr if proc.returncode else proc.stdout
+                scope()["_stdout"] = proc.stderr if proc.returncode else proc.stdout
                 variables["return"] = proc.returncode
 
             case "delay":
@@ -1126,12 +1199,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
 
             case "try":
                 # find next except in remainder and register
-                except_line = None
-                for i, l in enumerate(current_lines[current_index:]):
-                    tks = tokenize(l)
-                    if tks and tks[0] == "except":
-                        except_line = current_index + i
-                        break
+                except_line = block_end(current_index)
                 if except_line is None:
                     raise SyntaxError(f"try without except at {current_source}:{current_index}")
                 try_state[0] = True
@@ -1143,19 +1211,15 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                     raise SyntaxError(f"except without try at {current_source}:{current_index}")
                 # if there was an exception saved, let execution continue and set Error variable
                 if try_state[2]:
-                    variables["Error"] = try_state[2]
+                    scope()["Error"] = try_state[2]
                     try_state[0] = False
                     try_state[1] = None
                     try_state[2] = None
                 else:
                     # no error occurred: skip until done
-                    j = current_index + 1
-                    while j < len(current_lines):
-                        tks = tokenize(current_lines[j])
-                        if tks and tks[0] == "done":
-                            current_index = j
-                            break
-                        j += 1
+                    done_line = block_end(current_index)
+                    if done_line is not None:
+                        current_index = done_line
 
             case "done":
                 # close try/except
@@ -1184,7 +1248,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                 break
 
             line = current_lines[current_index]
-            parsed = tokenize(line)
+            parsed = indexes[current_source][0][current_index]
             if not parsed:
                 current_index += 1
                 continue
@@ -1229,6 +1293,7 @@ def runRuby(main_code: str, source_dict: dict[str, str] = {}, bound: bool = True
                 continue
 
             # otherwise print full helpful error and exit loop
+            import traceback
             tb = traceback.extract_tb(e.__traceback__)
             lineno = tb[-1].lineno if tb else "?"
             print("=== RUNTIME ERROR ===")
@@ -1,5 +1,7 @@
-import re, types, time
-import sys, copy, os
+import re, types, time, marshal, struct, operator
+import sys, copy, os, mmap, io, contextlib, threading
+# asyncio, concurrent.futures, pickle, hashlib and tracemalloc are imported where they are
+# used: together they are most of the import time and a plain script needs none of them
 
 # ===== Lexer =====
 TOKEN_SPEC = [
@@ -14,10 +16,18 @@ TOKEN_SPEC = [
 TOKEN_RE = re.compile("|".join(f"(?P<{n}>{p})" for n, p in TOKEN_SPEC))
 
 KEYWORDS = {
-    "def", "return", "end", "while", "for", "in", "true", "false", "null", "if", "import"
+    "def", "return", "end", "while", "for", "in", "true", "false", "null", "if", "import",
+    "and", "or", "not", "elif", "else", "break", "continue"
 }
 
+# a line ending in one of these goes on with the next line, the newline is just space
+CONTINUED_AFTER = frozenset((
+    "+", "-", "*", "/", "<", ">", "<=", ">=", "==", "!=", "=", ",", ".", "and", "or", "not"
+))
+
 class Token:
+    __slots__ = ("kind", "text", "line", "col")
+
     def __init__(self, kind, text, line, col):
         self.kind = kind
         self.text = text
@@ -30,6 +40,8 @@ def lex(src):
     line = 1
     col = 1
     toks = []
+    depth = 0  # open ( [ {
+    intern = sys.intern
     for m in TOKEN_RE.finditer(src):
         kind = m.lastgroup
         text = m.group()
@@ -37,20 +49,29 @@ def lex(src):
             col += len(text)
             continue
         if kind == "NL":
-            toks.append(Token("NL", "\n", line, col))
+            if not depth and not (toks and toks[-1].kind in CONTINUED_AFTER):
+                toks.append(Token("NL", "\n", line, col))
             line += 1
             col = 1
             continue
+        # names and operators are interned: every occurrence of a name shares one str, and the
+        # env maps and dict keys they end up in are then matched by identity before comparing
         if kind == "ID" and text in KEYWORDS:
+            text = intern(text)
             toks.append(Token(text, text, line, col))
         elif kind == "ID":
-            toks.append(Token("ID", text, line, col))
+            toks.append(Token("ID", intern(text), line, col))
         elif kind == "NUMBER":
             toks.append(Token("NUMBER", text, line, col))
         elif kind == "STRING":
             toks.append(Token("STRING", text, line, col))
         elif kind == "OP":
+            text = intern(text)
             toks.append(Token(text, text, line, col))
+            if text in ("(", "[", "{"):
+                depth += 1
+            elif text in (")", "]", "}") and depth:
+                depth -= 1
         elif kind == "MISMATCH":
             raise SyntaxError(f"Unexpected character {text!r} at {line}:{col}")
         col += len(text)
@@ -59,13 +80,21 @@ def lex(src):
 
 # ===== Parser (Pratt for expressions) =====
 
+class IncompleteInput(SyntaxError):
+    pass
+
 class Parser:
     def __init__(self, tokens):
         self.toks = tokens
         self.i = 0
         self.cur = self.toks[self.i]
+        self.last = self.cur
+        self.error_tok = None  # token a SyntaxError was raised at
+        self.strings = {}  # raw string token -> decoded value
+        self.loops = 0  # loop bodies being parsed, break/continue are only valid inside one
 
     def advance(self):
+        self.last = self.cur
         self.i += 1
         if self.i < len(self.toks):
             self.cur = self.toks[self.i]
@@ -84,16 +113,56 @@ class Parser:
         t = self.match(*kinds)
         if t is None:
             want = " or ".join(kinds)
+            self.error_tok = self.cur
             raise SyntaxError(f"Expected {want} at {self.cur.line}:{self.cur.col}, got {self.cur.kind} {self.cur.text!r}")
         return t
 
+    def spanned(self, node, start):
+        # compact source span: (line, col, end line, end col) from start to the last consumed token
+        node["span"] = (start.line, start.col, self.last.line, self.last.col + len(self.last.text))
+        return node
+
+    def string_value(self, text):
+        # each distinct literal is decoded once per source; identifier-like ones are interned,
+        # like CPython does for its own constants, so `{"key": 1}` and `.key` share one str
+        value = self.strings.get(text)
+        if value is None:
+            value = bytes(text[1:-1], "utf-8").decode("unicode_escape")
+            if value.isidentifier():
+                value = sys.intern(value)
+            self.strings[text] = value
+        return value
+
     def skip_semi_nl(self):
         while self.match(";", "NL"):
             pass
 
     def parse(self):
+        start = self.cur
         body = self.parse_block_until_end(allow_top_level=True)
-        return {"type":"block", "stmts": body}
+        return self.spanned({"type":"block", "stmts": body}, start)
+
+    def parse_chunk(self):
+        """
+        Parse REPL input: statements up to EOF, a closing top-level `end` is optional.
+
+        Raises:
+            IncompleteInput: The source ends inside a statement (an open block, an open
+                bracket, a trailing operator, ...) and more lines could still complete it.
+        """
+        start = self.cur
+        stmts = []
+        try:
+            self.skip_semi_nl()
+            while self.cur.kind != "EOF" and self.cur.text != "end":
+                stmts.append(self.parse_stmt())
+                self.skip_semi_nl()
+        except SyntaxError as e:
+            if self.error_tok is not None and self.error_tok.kind == "EOF":
+                raise IncompleteInput(str(e)) from None
+            raise
+        self.match("end")
+        return self.spanned({"type":"block", "stmts": stmts}, start)
 
     def parse_block_until_end(self, allow_top_level=False, terminators=("end",)):
         stmts = []
@@ -108,11 +177,18 @@ class Parser:
             self.skip_semi_nl()
             if allow_top_level and self.cur.kind == "EOF":
                 break
+        if self.cur.text in terminators and self.cur.text != "end":
+            # elif/else, the caller parses the next branch
+            return stmts
         if "end" in terminators:
             self.expect("end")
         return stmts
 
     def parse_stmt(self):
+        start = self.cur
+        return self.spanned(self.parse_stmt_kind(), start)
+
+    def parse_stmt_kind(self):
         if self.cur.text == "def":
             return self.parse_def()
         if self.cur.text == "return":
@@ -125,13 +201,18 @@ class Parser:
             cond = self.parse_expression()
             self.expect(")")
             self.skip_semi_nl()
-            body = self.parse_block_until_end(terminators=("end",))
+            body = self.parse_loop_body()
             return {"type":"while", "cond":cond, "body":body}
         if self.cur.text == "if":
             self.advance()
-            cond = self.parse_expression()
-            body = self.parse_block_until_end()
-            return {"type":"if", "cond":cond, "body":body}
+            return self.parse_if()
+        if self.cur.text in ("break", "continue"):
+            if not self.loops:
+                self.error_tok = self.cur
+                raise SyntaxError(f"{self.cur.text} outside of a loop at {self.cur.line}:{self.cur.col}")
+            kind = self.cur.text
+            self.advance()
+            return {"type": kind}
         if self.cur.text == "import":
             self.advance()
             fileName = self.parse_expression()
@@ -176,7 +257,12 @@ class Parser:
                 self.expect(",")
 
         self.skip_semi_nl()
-        body = self.parse_block_until_end(terminators=("end",))
+        # a loop around the def does not make break valid in its body
+        loops, self.loops = self.loops, 0
+        try:
+            body = self.parse_block_until_end(terminators=("end",))
+        finally:
+            self.loops = loops
 
         full.update({"params": params, "body": body})
         return full
@@ -191,28 +277,48 @@ class Parser:
             step = self.parse_stmt()
             self.expect(")")
             self.skip_semi_nl()
-            body = self.parse_block_until_end(terminators=("end",))
+            body = self.parse_loop_body()
             return {"type":"for_c", "init": init, "cond": cond, "step": step, "body": body}
         else:
             var = self.expect("ID").text
             self.expect("in")
             iterable = self.parse_expression()
             self.skip_semi_nl()
-            body = self.parse_block_until_end(terminators=("end",))
+            body = self.parse_loop_body()
             return {"type":"for_in", "var": var, "iter": iterable, "body": body}
 
+    def parse_loop_body(self):
+        self.loops += 1
+        try:
+            return self.parse_block_until_end(terminators=("end",))
+        finally:
+            self.loops -= 1
+
+    def parse_if(self):
+        # after `if` or `elif`: an elif is an if node in the else slot of the branch before,
+        # so the whole chain shares the one closing `end`
+        start = self.last
+        cond = self.parse_expression()
+        body = self.parse_block_until_end(terminators=("end", "elif", "else"))
+        node = {"type":"if", "cond":cond, "body":body, "else":None}
+        if self.match("elif"):
+            node["else"] = self.parse_if()
+        elif self.match("else"):
+            node["else"] = self.parse_block_until_end()
+        return self.spanned(node, start)
+
     # Pratt parser with postfix (call, index, dot) and infix operators
     def parse_expression(self, rbp=0):
-        t = self.cur
+        start = t = self.cur
         self.advance()
-        left = self.nud(t)
+        left = self.spanned(self.nud(t), start)
         while True:
             t = self.cur
             lbp = self.lbp(t)
             if rbp >= lbp:
                 break
             self.advance()
-            left = self.led(t, left)
+            left = self.spanned(self.led(t, left), start)
         return left
 
     def nud(self, t):
@@ -222,16 +328,16 @@ class Parser:
             else:
                 return {"type":"number", "value": int(t.text)}
         if t.kind == "STRING":
-            s = bytes(t.text[1:-1], "utf-8").decode("unicode_escape")
-            return {"type":"string", "value": s}
+            return {"type":"string", "value": self.string_value(t.text)}
         if t.kind == "ID":
-            if t.text == "true":
-                return {"type":"bool", "value": True}
-            if t.text == "false":
-                return {"type":"bool", "value": False}
-            if t.text == "null":
-                return {"type":"null"}
             return {"type":"var", "name": t.text}
+        # keyword tokens carry their text as kind
+        if t.kind == "true":
+            return {"type":"bool", "value": True}
+        if t.kind == "false":
+            return {"type":"bool", "value": False}
+        if t.kind == "null":
+            return {"type":"null"}
         if t.text == "(":
             expr = self.parse_expression()
             self.expect(")")
@@ -254,10 +360,10 @@ class Parser:
                     if self.cur.kind == "STRING":
                         k = self.cur.text
                         self.advance()
-                        key_node = {"type":"string", "value": bytes(k[1:-1], "utf-8").decode("unicode_escape")}
+                        key_node = self.spanned({"type":"string", "value": self.string_value(k)}, self.last)
                     else:
                         k = self.expect("ID").text
-                        key_node = {"type":"string", "value": k}
+                        key_node = self.spanned({"type":"string", "value": k}, self.last)
                     self.expect(":")
                     val = self.parse_expression()
                     items.append((key_node, val))
@@ -271,6 +377,11 @@ class Parser:
         if t.text == "+":
             expr = self.parse_expression(70)
             return {"type":"unary", "op":"+", "expr":expr}
+        if t.kind == "not":
+            # binds looser than comparisons: not a == b is not (a == b)
+            expr = self.parse_expression(30)
+            return {"type":"not", "expr":expr}
+        self.error_tok = t
         raise SyntaxError(f"Unexpected token {t}")
 
     def lbp(self, t):
@@ -284,6 +395,10 @@ class Parser:
             return 40
         if t.text in ("==", "!="):
             return 35
+        if t.kind == "and":
+            return 20
+        if t.kind == "or":
+            return 10
         return 0
 
     def led(self, t, left):
@@ -305,9 +420,13 @@ class Parser:
             name = self.expect("ID").text
             # sugar for dict property access
             return {"type":"prop", "object": left, "name": name}
-        if t.text in ("*", "/", "+", "-","<",">","<=",">=","==","!="):
+        if t.text in BINOPS:
             right = self.parse_expression(self.lbp(t))
             return {"type":"binop", "op": t.text, "left": left, "right": right}
+        if t.kind in ("and", "or"):
+            right = self.parse_expression(self.lbp(t))
+            return {"type": t.kind, "left": left, "right": right}
+        self.error_tok = t
         raise SyntaxError(f"Unexpected infix {t.text}")
 
 # ===== Runtime / Interpreter =====
@@ -339,6 +458,9 @@ def wrap_for_py(val):
     if isinstance(val, Function):
         return val
 
+    if isinstance(val, Handle):
+        return {"type": val.kind, "value": val}
+
     if isinstance(val, type):
         members = {}
         for k, v in vars(val).items():
@@ -401,6 +523,8 @@ def unwrap_from_py(obj):
         return obj
     t = obj.get("type")
     v = obj.get("value", None)
+    if isinstance(v, Handle):
+        return v
     if t == "null":
         return None
     if t == "bool":
@@ -460,7 +584,30 @@ class Function:
         self.env = env
         self.escapeToPython = escapeToPython
         self.pyfunc = pyfunc
+    def __deepcopy__(self, memo):
+        # functions are shared by reference: copying one would copy its whole defining env,
+        # unless that env is being copied anyway (Interpreter.fork), then the copy has to follow it
+        scope = self.env
+        while scope is not None and id(scope) not in memo:
+            scope = scope.parent
+        if scope is None:
+            return self
+        fn = copy.copy(self)
+        memo[id(self)] = fn
+        fn.env = copy.deepcopy(self.env, memo)
+        return fn
     def __call__(self, argvals):
+        tracer = tracing.tracer
+        if tracer is None:
+            return self.invoke(argvals)
+        tracer.on_call(self, argvals)
+        value = None
+        try:
+            value = self.invoke(argvals)
+            return value
+        finally:
+            tracer.on_return(self, value)
+    def invoke(self, argvals):
         if self.escapeToPython:
             wrapped_args = [wrap_for_py(v) for v in argvals]
             res = self.pyfunc(wrapped_args, self.env)
@@ -474,6 +621,176 @@ class Function:
             return rs.value
         return None
 
+# ===== Host handles (files, line streams, mmaps) =====
+
+class Handle:
+    # opaque host objects: passed through wrap/unwrap as-is and never deep-copied on assign
+    kind = "handle"
+    def __deepcopy__(self, memo):
+        return self
+
+class LineIterator(Handle):
+    kind = "lines"
+    def __init__(self, source, closer=None):
+        self.source = iter(source)
+        self.closer = closer
+    def __iter__(self):
+        return self
+    def __next__(self):
+        try:
+            line = next(self.source)
+        except StopIteration:
+            self.close()
+            raise
+        if isinstance(line, bytes):
+            return line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+        return line.rstrip("\r\n")
+    def close(self):
+        if self.closer is not None:
+            self.closer()
+            self.closer = None
+
+class FileHandle(Handle):
+    kind = "file"
+    def __init__(self, path, mode="r"):
+        if mode not in ("r", "w", "a"):
+            raise ValueError(f"Unsupported file mode {mode!r}, expected r, w or a")
+        self.path = path
+        self.mode = mode
+        self.f = open(path, mode, encoding="utf-8", errors="replace")
+    def __iter__(self):
+        return LineIterator(self.f)
+    def readline(self):
+        line = self.f.readline()
+        if not line:
+            return None
+        return line.rstrip("\r\n")
+    def write(self, text):
+        self.f.write(text)
+    def close(self):
+        self.f.close()
+
+class MappedFile(Handle):
+    kind = "mmap"
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            # mmap refuses zero-length files
+            if os.fstat(f.fileno()).st_size:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.mm = b""
+    def __len__(self):
+        return len(self.mm)
+    def __getitem__(self, i):
+        if not -len(self.mm) <= i < len(self.mm):
+            raise IndexError("mmap index out of range")
+        return self.read(i, i + 1 if i != -1 else None)
+    def read(self, start, end=None):
+        return self.mm[start:end].decode("utf-8", errors="replace")
+    def raw_lines(self):
+        mm = self.mm
+        n = len(mm)
+        pos = 0
+        while pos < n:
+            nl = mm.find(b"\n", pos)
+            end = n if nl == -1 else nl + 1
+            yield mm[pos:end]
+            pos = end
+    def __iter__(self):
+        return LineIterator(self.raw_lines())
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+
+# ===== Async mode (cooperative ros tasks on an asyncio loop) =====
+
+class Task(Handle):
+    kind = "task"
+    def __init__(self, name, fn, args):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        from concurrent.futures import Future
+        self.future = Future()
+        self.awaited = False
+        self.budget = limits.budget  # tasks spend from the budget of the run that spawned them
+        self.tracer = tracing.tracer  # and are traced like it
+
+class AsyncRuntime:
+    # every task gets a thread for its stack, but only the one holding `turn` runs ros code;
+    # tasks switch only where they wait (delay, await, blocking io), so ros code never races.
+    # The threads are not pooled: a pooled task could wait on one still queued behind it,
+    # so every live task costs an OS thread (see the async section of the README)
+    def __init__(self):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        self.turn = threading.Lock()
+        self.tasks = []
+        self.local = threading.local()
+    def __deepcopy__(self, memo):
+        return self
+    def in_task(self):
+        return getattr(self.local, "task", None) is not None
+    def spawn(self, name, fn, args):
+        task = Task(name, fn, args)
+        self.tasks.append(task)
+        threading.Thread(target=self.run_task, args=(task,), name=f"ros-task-{name}", daemon=True).start()
+        return task
+    def run_task(self, task):
+        self.local.task = task
+        limits.budget = task.budget
+        tracing.tracer = task.tracer
+        with self.turn:
+            try:
+                task.future.set_result(task.fn(task.args))
+            except BaseException as e:
+                task.future.set_exception(e)
+    def blocking(self, fn, *args):
+        # give the turn away for the duration of a blocking call, then queue for it again
+        if not self.in_task():
+            return fn(*args)
+        self.turn.release()
+        try:
+            return fn(*args)
+        finally:
+            self.turn.acquire()
+    def wait(self, coro):
+        import asyncio
+        return self.blocking(asyncio.run_coroutine_threadsafe(coro, self.loop).result)
+    def join(self, task):
+        task.awaited = True
+        return self.blocking(task.future.result)
+    def run_main(self, fn):
+        import asyncio
+        main = self.spawn("main", fn, [])
+        main.awaited = True
+        async def drain():
+            # a task can only be spawned by a running task, so once every known task is done we are finished
+            while not all(t.future.done() for t in list(self.tasks)):
+                pending = [asyncio.wrap_future(t.future) for t in list(self.tasks) if not t.future.done()]
+                await asyncio.gather(*pending, return_exceptions=True)
+        try:
+            self.loop.run_until_complete(drain())
+        finally:
+            self.loop.close()
+        main.future.result()
+        for t in self.tasks:
+            # nobody awaited these, don't let their errors vanish
+            if not t.awaited and t.future.exception() is not None:
+                raise t.future.exception()
+
+def async_runtime(env):
+    scope = env.resolve_scope("__async__") if env is not None else None
+    if scope is not None:
+        return scope.map["__async__"]
+    interp = interpreter_of(env)
+    return interp.runtime if interp is not None else None
+
+def interpreter_of(env):
+    scope = env.resolve_scope("__interp__") if env is not None else None
+    return scope.map["__interp__"] if scope is not None else None
+
 def is_truthy(v):
     return bool(v)
 
@@ -484,6 +801,10 @@ def get_indexed(obj, index):
         return obj[index]
     if isinstance(obj, dict):
         return obj[index]
+    if isinstance(obj, MappedFile):
+        if not isinstance(index, int):
+            raise TypeError("mmap index must be integer")
+        return obj[index]
     raise TypeError(f"Indexing only supported on list and dict not on {type(obj)} of value {obj}")
 
 def set_indexed(obj, index, value):
@@ -497,18 +818,57 @@ def set_indexed(obj, index, value):
         return
     raise TypeError("Index assignment only supported on list and dict")
 
+# binop dispatch, one lookup instead of comparing op against every operator in turn
+BINOPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
 def eval_expr(node, env):
     t = node["type"]
+    # ordered by how often each kind is evaluated
+    if t == "var":
+        return env.get(node["name"])
     if t == "number":
         return node["value"]
+    if t == "binop":
+        a = eval_expr(node["left"], env)
+        b = eval_expr(node["right"], env)
+        op = node["op"]
+        # int/int and float/float (loop counters, arithmetic): the hottest operators inline
+        ta = type(a)
+        if (ta is int or ta is float) and type(b) is ta:
+            if op == "+": return a + b
+            if op == "<": return a < b
+            if op == "-": return a - b
+        return BINOPS[op](a, b)
+    if t == "and":
+        # the right side only runs when the left one is truthy; the deciding operand is the value
+        a = eval_expr(node["left"], env)
+        if not is_truthy(a):
+            return a
+        return eval_expr(node["right"], env)
+    if t == "or":
+        a = eval_expr(node["left"], env)
+        if is_truthy(a):
+            return a
+        return eval_expr(node["right"], env)
+    if t == "not":
+        return not is_truthy(eval_expr(node["expr"], env))
     if t == "string":
         return node["value"]
     if t == "bool":
         return node["value"]
     if t == "null":
         return None
-    if t == "var":
-        return env.get(node["name"])
     if t == "list":
         return [eval_expr(x, env) for x in node["items"]]
     if t == "dict":
@@ -524,21 +884,6 @@ def eval_expr(node, env):
             return -v
         if node["op"] == "+":
             return +v
-    if t == "binop":
-        a = eval_expr(node["left"], env)
-        b = eval_expr(node["right"], env)
-        op = node["op"]
-        if op == "+": return a + b
-        if op == "-": return a - b
-        if op == "*": return a * b
-        if op == "/": return a / b
-        if op == "<": return a < b
-        if op == ">": return a > b
-        if op == "<=": return a <= b
-        if op == ">=": return a >= b
-        if op == "==": return a == b
-        if op == "!=": return a != b
-
     if t == "call":
         funcnode = node["func"]
 
@@ -608,6 +953,11 @@ def as_lvalue(node, env):
         return get, setv
     raise SyntaxError("Invalid left-hand side")
 
+# break/continue travel back up as the return value of exec_stmt and exec_block, so the
+# loop that consumes them needs no try/except per iteration
+BREAK = "break"
+CONTINUE = "continue"
+
 def exec_stmt(node, env):
     t = node["type"]
     if t == "assign":
@@ -634,15 +984,22 @@ def exec_stmt(node, env):
         return
 
 
-    if t == "while":
-        while is_truthy(eval_expr(node["cond"], env)):
-            exec_block(node["body"], Env(env))
+    if t in ("while", "for_in", "for_c"):
+        exec_loop(node, env)
         return
     if t == "if":
-        cond = eval_expr(node["cond"], env)
-        if is_truthy(cond):
-            exec_block(node["body"], Env(env))
-        return
+        # walk the elif chain in place: one scope for the branch taken, none for the tests
+        while not is_truthy(eval_expr(node["cond"], env)):
+            node = node["else"]
+            if node is None:
+                return
+            if type(node) is list:
+                return exec_block(node, Env(env))
+        return exec_block(node["body"], Env(env))
+    if t == "break":
+        return BREAK
+    if t == "continue":
+        return CONTINUE
     if t == "import":
         fileName = eval_expr(node["fileName"], env)
         files = env.get("__importables__")
@@ -650,8 +1007,15 @@ def exec_stmt(node, env):
             raise TypeError("import path must be a string")
         if fileName not in files.keys():
             raise FileNotFoundError(f"Module '{fileName}' not found")
-        runEnv = run(files[fileName], make_global_env(files))
-        module = runEnv.get("module")
+        interp = interpreter_of(env)
+        if interp is not None:
+            module = interp.load_module(fileName)
+        else:
+            modEnv = make_global_env(files)
+            runtime = async_runtime(env)
+            if runtime is not None:
+                modEnv.set_here("__async__", runtime)
+            module = run(files[fileName], modEnv).get("module")
         env.set(fileName.split(".")[0], module)
         return
     if t == "del":
@@ -661,28 +1025,353 @@ def exec_stmt(node, env):
         env.remove(expr["name"])
         return
 
+    if t == "block":
+        return exec_block(node["stmts"], env)
+    raise RuntimeError(f"Unknown statement {t}")
+
+def exec_loop(node, env):
+    t = node["type"]
+    budget = limits.budget
+    tracer = tracing.tracer
+    on_iter = tracer.on_loop_iter if tracer is not None else None
+    if t == "while":
+        while is_truthy(eval_expr(node["cond"], env)):
+            if budget is not None:
+                budget.step()
+            scope = Env(env)
+            if on_iter is not None:
+                on_iter(node, scope)
+            if exec_block(node["body"], scope) is BREAK:
+                break
+        return
     if t == "for_in":
         iterable = eval_expr(node["iter"], env)
-        if not isinstance(iterable, list):
-            raise TypeError("for-in expects a list")
-        for v in iterable:
-            env.set(node["var"], v)
-            exec_block(node["body"], Env(env))
+        if not isinstance(iterable, (list, Handle)):
+            raise TypeError("for-in expects a list or a line stream")
+        try:
+            for v in iterable:
+                env.set(node["var"], v)
+                if budget is not None:
+                    budget.step()
+                scope = Env(env)
+                if on_iter is not None:
+                    on_iter(node, scope)
+                if exec_block(node["body"], scope) is BREAK:
+                    break
+        finally:
+            # a line stream left by break (or an error) closes its file now, not at gc
+            if isinstance(iterable, LineIterator):
+                iterable.close()
         return
     if t == "for_c":
+        if tracer is not None:
+            tracer.on_stmt(node["init"], env)
         exec_stmt(node["init"], env)
         while is_truthy(eval_expr(node["cond"], env)):
-            exec_block(node["body"], Env(env))
+            if budget is not None:
+                budget.step()
+            scope = Env(env)
+            if on_iter is not None:
+                on_iter(node, scope)
+            if exec_block(node["body"], scope) is BREAK:
+                break
+            if tracer is not None:
+                tracer.on_stmt(node["step"], env)
             exec_stmt(node["step"], env)
         return
-    if t == "block":
-        exec_block(node["stmts"], env)
-        return
-    raise RuntimeError(f"Unknown statement {t}")
 
 def exec_block(stmts, env):
+    budget = limits.budget
+    tracer = tracing.tracer
     for s in stmts:
-        exec_stmt(s, env)
+        if budget is not None:
+            budget.steps += 1
+            if budget.steps >= budget.next_check:
+                budget.check()
+        if tracer is not None:
+            tracer.on_stmt(s, env)
+        try:
+            signal = exec_stmt(s, env)
+        except ReturnSignal:
+            raise
+        except Exception as e:
+            # the innermost statement names the position, outer blocks leave it alone
+            if not hasattr(e, "ros_span") and "span" in s:
+                e.ros_span = s["span"]
+                e.add_note(f"in ros source at line {s['span'][0]}:{s['span'][1]}")
+            raise
+        if signal is not None:
+            return signal
+
+# ===== Execution budgets =====
+
+class BudgetExceeded(RuntimeError):
+    """A run went over one of its Budget limits; kind is "steps", "time", "memory" or "env_memory"."""
+    def __init__(self, kind, limit, used, metrics):
+        super().__init__(f"execution budget exceeded: {kind} used {used}, limit {limit}")
+        self.kind = kind
+        self.limit = limit
+        self.used = used
+        self.metrics = metrics
+
+class Budget:
+    """
+    Step, wall-time and memory limits for a run, plus its counters.
+
+    The limits apply to each run on their own: start() clears whatever an earlier
+    run left in the counters, so one Budget can be passed to run after run (as
+    --watch does) and metrics() describes the latest.
+
+    Every executed statement is one step, and so is every loop iteration (an empty
+    loop body still spends). Only the step count is kept on every step and time is
+    looked at every check_every steps, so a Budget without a memory cap is cheap
+    enough to always pass just for metrics().
+
+    Args:
+        max_steps (int): Statements plus loop iterations a run may execute.
+        max_time (float): Wall seconds a run may take.
+        max_memory (int): Bytes of python memory a run may hold (tracemalloc, process wide).
+        account (MemoryAccount): Per variable accounting of the run's ros values.
+    """
+    check_every = 1000
+
+    def __init__(self, max_steps=None, max_time=None, max_memory=None, account=None):
+        self.max_steps = max_steps
+        self.max_time = max_time
+        self.max_memory = max_memory
+        self.account = account
+        self.steps = 0
+        self.started = None
+        self.elapsed = 0.0
+        self.peak_memory = None
+        self.tracing = False
+        self.next_check = self.check_every
+
+    def start(self, env=None):
+        self.steps = 0
+        self.elapsed = 0.0
+        self.peak_memory = None
+        self.started = time.perf_counter()
+        if self.account is not None:
+            self.account.reset()
+            self.account.root = env
+            self.account.next_census = self.steps + self.account.every
+        if self.max_memory is not None:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.tracing = True
+        self.schedule()
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.started
+        if self.max_memory is not None:
+            import tracemalloc
+            self.peak_memory = max(self.peak_memory or 0, tracemalloc.get_traced_memory()[1])
+            if self.tracing:
+                tracemalloc.stop()
+                self.tracing = False
+
+    def step(self):
+        self.steps += 1
+        if self.steps >= self.next_check:
+            self.check()
+
+    def schedule(self):
+        # one statement can double a value, so with a memory cap every step is checked;
+        # tracemalloc costs far more than the check anyway
+        self.next_check = self.steps + (1 if self.max_memory is not None else self.check_every)
+        if self.max_steps is not None:
+            # the step limit is exact, only time and memory are sampled
+            self.next_check = min(self.next_check, self.max_steps + 1)
+        if self.account is not None:
+            self.next_check = min(self.next_check, self.account.next_census)
+
+    def check(self):
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise BudgetExceeded("steps", self.max_steps, self.steps, self.metrics())
+        if self.max_time is not None:
+            spent = time.perf_counter() - self.started
+            if spent > self.max_time:
+                raise BudgetExceeded("time", self.max_time, spent, self.metrics())
+        if self.max_memory is not None:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak_memory = max(self.peak_memory or 0, peak)
+            if current > self.max_memory:
+                raise BudgetExceeded("memory", self.max_memory, current, self.metrics())
+        account = self.account
+        if account is not None and self.steps >= account.next_census:
+            account.next_census = self.steps + account.every
+            account.census(stack_frames())
+            if account.limit is not None and account.total > account.limit:
+                raise BudgetExceeded("env_memory", account.limit, account.total, self.metrics())
+        self.schedule()
+
+    def metrics(self):
+        wall = self.elapsed if self.started is None or self.elapsed else time.perf_counter() - self.started
+        metrics = {"steps": self.steps, "wall": wall, "peak_memory": self.peak_memory}
+        if self.account is not None:
+            metrics["env_bytes"] = self.account.total
+            metrics["peak_env_bytes"] = self.account.peak
+        return metrics
+
+# ===== Memory accounting =====
+
+class MemoryAccount:
+    """
+    Approximate bytes held by a run's ros values, per Env and per variable.
+
+    Attached to a Budget it takes a census every `every` steps: it walks the scopes
+    live on the interpreter stack with their parents, plus the scopes closures keep
+    alive (which covers imported modules' globals), and sizes every variable's value.
+    A value reachable from several variables is counted once. The last census, taken
+    when the run ends or at the failing statement if it raises, stays in `total`,
+    `by_env` and `largest`.
+
+    Args:
+        limit (int): Abort with BudgetExceeded("env_memory") once a census is over this many bytes.
+        every (int): Steps between censuses.
+        top (int): How many of the largest variables to keep.
+    """
+    def __init__(self, limit=None, every=10000, top=10):
+        self.limit = limit
+        self.every = every
+        self.top = top
+        self.root = None
+        self.next_census = every
+        self.total = 0
+        self.peak = 0
+        self.by_env = {}   # scope label -> bytes
+        self.largest = []  # [(bytes, scope label, name)]
+
+    def reset(self):
+        self.total = self.peak = 0
+        self.by_env = {}
+        self.largest = []
+
+    def census(self, frames):
+        seen = set()
+        queued = set()
+        queue = []
+
+        def add_env(env, label):
+            while env is not None and id(env) not in queued:
+                queued.add(id(env))
+                queue.append((env, label))
+                env, label = env.parent, "scope"
+
+        def size_of(v):
+            if id(v) in seen:
+                return 0
+            seen.add(id(v))
+            n = sys.getsizeof(v)
+            if isinstance(v, list):
+                n += sum(size_of(x) for x in v)
+            elif isinstance(v, dict):
+                n += sum(size_of(k) + size_of(x) for k, x in v.items())
+            elif isinstance(v, Function) and v.env is not None:
+                add_env(v.env, f"closure of {v.name}")
+            return n
+
+        if self.root is not None:
+            add_env(self.root, "globals")
+        # frames run outermost first; scopes are labelled with the ros function they belong to
+        fname = "main"
+        for frame in frames:
+            local = frame.f_locals
+            if frame.f_code.co_name == "__call__" and isinstance(local.get("self"), Function):
+                fname = local["self"].name + "()"
+            for v in local.values():
+                if isinstance(v, Env):
+                    add_env(v, fname)
+
+        total = 0
+        by_env = {}
+        found = []
+        i = 0
+        while i < len(queue):
+            env, label = queue[i]
+            i += 1
+            if env is self.root:
+                label = "globals"
+            elif "__importables__" in env.map:
+                label = "module globals"
+            for name, v in list(env.map.items()):
+                if name.startswith("__"):
+                    continue  # host state (module sources, interpreter, loop), not ros values
+                n = size_of(v)
+                total += n
+                by_env[label] = by_env.get(label, 0) + n
+                found.append((n, label, name))
+        self.total = total
+        self.peak = max(self.peak, total)
+        self.by_env = by_env
+        self.largest = sorted(found, reverse=True)[:self.top]
+
+    def report(self, out=None):
+        out = out or sys.stderr
+        print(f"ros values: ~{self.total} bytes live, peak ~{self.peak}", file=out)
+        for label, n in sorted(self.by_env.items(), key=lambda kv: -kv[1]):
+            print(f"{n:>12}  {label}", file=out)
+        print("largest variables:", file=out)
+        for n, label, name in self.largest:
+            print(f"{n:>12}  {name} ({label})", file=out)
+
+def stack_frames():
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    return frames[::-1]
+
+def traceback_frames(tb):
+    frames = []
+    while tb is not None:
+        frames.append(tb.tb_frame)
+        tb = tb.tb_next
+    return frames
+
+class RunLimits(threading.local):
+    budget = None  # the Budget of the run executing on this thread
+
+limits = RunLimits()
+
+class Tracing(threading.local):
+    tracer = None  # the Tracer installed on this thread, see set_tracer()
+
+tracing = Tracing()
+
+# ===== Tracing hooks =====
+
+class Tracer:
+    """
+    Base class for tracing hooks (coverage, profilers, debuggers). Subclass it,
+    override the events you need and install it with set_tracer().
+
+    A tracer belongs to the thread that installed it (and the parallelMap workers and
+    async tasks its runs start), so other threads, Interpreters running on them and
+    processMap workers are never traced by it. Without a tracer, statements and calls
+    pay one None check each.
+
+    on_call(fn, args)        before a ros or builtin function runs
+    on_return(fn, value)     after it finished (value is None if it raised)
+    on_stmt(node, env)       before every statement, node["span"] is (line, col, end line, end col)
+    on_loop_iter(node, env)  before every iteration of a while/for loop, env is the iteration scope
+    """
+    def on_call(self, fn, args):
+        pass
+    def on_return(self, fn, value):
+        pass
+    def on_stmt(self, node, env):
+        pass
+    def on_loop_iter(self, node, env):
+        pass
+
+def set_tracer(tracer):
+    """Install tracer (a Tracer) on the current thread, or remove the current one with None."""
+    tracing.tracer = tracer
 
 # ===== Builtins and Python interop =====
 
@@ -693,13 +1382,21 @@ def py_print(args_wrapped, env):
 
 def py_input(args_wrapped, env):
     vals = [unwrap_from_py(a) for a in args_wrapped]
+    runtime = async_runtime(env)
+    if runtime is not None:
+        return wrap_for_py(runtime.blocking(input, *vals))
     return wrap_for_py(input(*vals))
 
 def py_delay(args_wrapped, env):
     vals = [unwrap_from_py(a) for a in args_wrapped]
     if len(vals) == 1:
         if isinstance(vals[0], (float, int)):
-            time.sleep(vals[0])
+            runtime = async_runtime(env)
+            if runtime is not None:
+                import asyncio
+                runtime.wait(asyncio.sleep(vals[0]))
+            else:
+                time.sleep(vals[0])
         else:
             raise TypeError("delay only expects int or floats (sec) as delay value")
     else:
@@ -745,25 +1442,304 @@ def py_split(args_wrapped, env):
         raise TypeError("can not split with a non string")
     return wrap_for_py(vals[0].split(vals[1]))
 
+def as_line_source(target, what):
+    # path, open file, line stream or mmap -> (iterable of lines, closer)
+    if isinstance(target, str):
+        f = FileHandle(target, "r")
+        return f, f.close
+    if isinstance(target, (FileHandle, LineIterator, MappedFile)):
+        return target, None
+    raise TypeError(f"{what} expects a path, file, line stream or mmap")
+
+def py_open(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if not (1 <= len(vals) <= 2):
+        raise TypeError("open expects 1 or 2 arguments")
+    if not isinstance(vals[0], str):
+        raise TypeError("open expects a string path")
+    mode = vals[1] if len(vals) == 2 else "r"
+    return wrap_for_py(FileHandle(vals[0], mode))
+
+def py_close(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 1 or not isinstance(vals[0], Handle):
+        raise TypeError("close expects a file, line stream or mmap")
+    vals[0].close()
+    return wrap_for_py(None)
+
+def py_readLine(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 1 or not isinstance(vals[0], FileHandle):
+        raise TypeError("readLine expects a file")
+    runtime = async_runtime(env)
+    if runtime is not None:
+        return wrap_for_py(runtime.blocking(vals[0].readline))
+    return wrap_for_py(vals[0].readline())
+
+def py_write(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 2 or not isinstance(vals[0], FileHandle):
+        raise TypeError("write expects a file and a string")
+    if not isinstance(vals[1], str):
+        raise TypeError("can not write a non string")
+    runtime = async_runtime(env)
+    if runtime is not None:
+        runtime.blocking(vals[0].write, vals[1])
+    else:
+        vals[0].write(vals[1])
+    return wrap_for_py(None)
+
+def py_readLines(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 1:
+        raise TypeError("readLines expects 1 argument")
+    source, closer = as_line_source(vals[0], "readLines")
+    if isinstance(source, LineIterator):
+        return wrap_for_py(source)
+    return wrap_for_py(LineIterator(iter(source), closer))
+
+def py_writeLines(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 2:
+        raise TypeError("writeLines expects 2 arguments")
+    target, lines = vals
+    if not isinstance(lines, (list, LineIterator, MappedFile)):
+        raise TypeError("writeLines expects a list or line stream of lines")
+    if isinstance(target, str):
+        f = FileHandle(target, "w")
+    elif isinstance(target, FileHandle):
+        f = target
+    else:
+        raise TypeError("writeLines expects a path or a file")
+    count = 0
+    try:
+        for line in lines:
+            f.write(f"{line}\n")
+            count += 1
+    finally:
+        if f is not target:
+            f.close()
+    return wrap_for_py(count)
+
+def py_mmap(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 1 or not isinstance(vals[0], str):
+        raise TypeError("mmap expects a string path")
+    return wrap_for_py(MappedFile(vals[0]))
+
+def py_readRange(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 3 or not isinstance(vals[0], MappedFile):
+        raise TypeError("readRange expects an mmap, a start and an end")
+    view, start, end = vals
+    if not isinstance(start, int) or not isinstance(end, int):
+        raise TypeError("readRange bounds must be integers")
+    return wrap_for_py(view.read(start, end))
+
+def py_parallelMap(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if not (2 <= len(vals) <= 3):
+        raise TypeError("parallelMap expects 2 or 3 arguments")
+    fn, items = vals[0], vals[1]
+    workers = vals[2] if len(vals) == 3 else None
+    if not isinstance(fn, Function):
+        raise TypeError("parallelMap expects a function")
+    if not isinstance(items, (list, Handle)):
+        raise TypeError("parallelMap expects a list or a line stream")
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise TypeError("parallelMap workers must be a positive integer")
+    # each task runs against its own fork of fn's defining scopes (functions follow the
+    # fork, handles stay shared), so tasks never race on an Env; writes a task makes to
+    # outer variables are discarded with its fork. The first failing task's exception is
+    # re-raised here
+    budget, tracer = limits.budget, tracing.tracer
+    def call(v):
+        limits.budget, tracing.tracer = budget, tracer
+        memo = {}
+        copy.deepcopy(fn.env, memo)
+        return copy.deepcopy(fn, memo)([v])
+    from concurrent.futures import ThreadPoolExecutor
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ros-parallelMap")
+    try:
+        results = list(pool.map(call, items))
+    except BaseException:
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown(wait=True)
+    return wrap_for_py(results)
+
+def py_spawn(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) < 1 or not isinstance(vals[0], Function):
+        raise TypeError("spawn expects a function and its arguments")
+    runtime = async_runtime(env)
+    if runtime is None:
+        raise RuntimeError("spawn needs async mode (run with --async)")
+    return wrap_for_py(runtime.spawn(vals[0].name, vals[0], vals[1:]))
+
+def py_await(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 1 or not isinstance(vals[0], Task):
+        raise TypeError("await expects a task")
+    return wrap_for_py(async_runtime(env).join(vals[0]))
+
+def py_awaitAll(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if len(vals) != 1 or not isinstance(vals[0], list) or not all(isinstance(t, Task) for t in vals[0]):
+        raise TypeError("awaitAll expects a list of tasks")
+    runtime = async_runtime(env)
+    return wrap_for_py([runtime.join(t) for t in vals[0]])
+
+# ===== Process pool (CPU-bound work past the GIL) =====
+
+process_fn = None  # the ros function a processMap worker runs, shipped once per worker
+
+def free_names(body, bound=()):
+    # every name a function body reads or assigns other than its parameters (assignments
+    # reach enclosing scopes, so they count); a superset of what the body needs is fine
+    names = set()
+    def walk(node, bound):
+        if isinstance(node, dict):
+            t = node.get("type")
+            if t == "var" and node["name"] not in bound:
+                names.add(node["name"])
+            elif t == "for_in" and node["var"] not in bound:
+                names.add(node["var"])
+            elif t == "methoddef" and node["obj"] not in bound:
+                names.add(node["obj"])
+            if t in ("def", "methoddef"):
+                bound = bound | set(node["params"])
+            for v in node.values():
+                walk(v, bound)
+        elif isinstance(node, (list, tuple)):
+            for v in node:
+                walk(v, bound)
+    walk(body, frozenset(bound))
+    return names
+
+def pack_for_process(fn):
+    """
+    Cut a ros function loose from its defining scopes for a processMap worker.
+
+    Only the values its body (and the bodies of the functions those values hold) can
+    reach are kept, flattened into one {name: value} map that becomes the worker's
+    globals. Functions are copied without their env; the worker points them at its
+    own globals.
+
+    Returns:
+        tuple: (root function copy, captured {name: value}, list of function copies)
+    """
+    originals = {}
+    captured = {}
+    copies = {}  # id(original function) -> the copy shipped in its place
+
+    def pack(value, name):
+        if isinstance(value, Function):
+            twin = copies.get(id(value))
+            if twin is None:
+                twin = copies[id(value)] = Function(value.name, value.params, value.body, None,
+                                                    value.escapeToPython, value.pyfunc)
+                if value.body is not None and value.env is not None:
+                    for free in sorted(free_names(value.body, value.params)):
+                        scope = value.env.resolve_scope(free)
+                        if scope is not None:
+                            capture(free, scope.map[free])
+            return twin
+        if isinstance(value, list):
+            return [pack(v, name) for v in value]
+        if isinstance(value, dict):
+            return {k: pack(v, name) for k, v in value.items()}
+        if isinstance(value, Handle):
+            raise TypeError(f"processMap can not send {fn.name} to a worker process: it uses {name}, "
+                            f"a {value.kind} handle that only exists in this process")
+        return value
+
+    def capture(name, value):
+        if name in originals:
+            seen = originals[name]
+            if seen is not value and not (type(seen) is type(value) and seen == value):
+                raise TypeError(f"processMap can not send {fn.name} to a worker process: "
+                                f"the functions it uses mean different things by {name}")
+            return
+        originals[name] = value
+        captured[name] = pack(value, name)
+
+    root = pack(fn, fn.name)
+    return root, captured, list(copies.values())
+
+def init_process_worker(payload):
+    global process_fn
+    import pickle
+    files, captured, functions, process_fn = pickle.loads(payload)
+    g = make_global_env(files)
+    for f in functions:
+        f.env = g
+    g.map.update(captured)
+
+def process_item(wrapped):
+    # values cross the process boundary in the wrapped form, same as the python interop
+    return wrap_for_py(process_fn([unwrap_from_py(wrapped)]))
+
+def py_processMap(args_wrapped, env):
+    vals = [unwrap_from_py(a) for a in args_wrapped]
+    if not (2 <= len(vals) <= 3):
+        raise TypeError("processMap expects 2 or 3 arguments")
+    fn, items = vals[0], vals[1]
+    workers = vals[2] if len(vals) == 3 else None
+    if not isinstance(fn, Function):
+        raise TypeError("processMap expects a function")
+    if not isinstance(items, (list, LineIterator, MappedFile)):
+        raise TypeError("processMap expects a list or a line stream")
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise TypeError("processMap workers must be a positive integer")
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor
+    # the function travels with the values it uses, not its defining scopes; whatever it
+    # changes there stays in the worker
+    root, captured, functions = pack_for_process(fn)
+    try:
+        payload = pickle.dumps((env.get("__importables__"), captured, functions, root))
+    except Exception as e:
+        for name, value in captured.items():
+            try:
+                pickle.dumps(value)
+            except Exception:
+                raise TypeError(f"processMap can not send {fn.name} to a worker process: "
+                                f"it uses {name}, which can not be copied to another process ({e})") from None
+        raise TypeError(f"processMap can not send {fn.name} to a worker process: {e}") from None
+    wrapped = [wrap_for_py(v) for v in items]
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(wrapped) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_process_worker, initargs=(payload,)) as pool:
+        results = list(pool.map(process_item, wrapped, chunksize=chunk))
+    return {"type":"list", "value": results}
+
 py_globals = {}
 py_locals = py_globals  # both point to same dict
 
+def py_namespace(env):
+    # every Interpreter has its own python namespace, plain run() shares the module one
+    interp = interpreter_of(env)
+    return interp.py_globals if interp is not None else py_globals
+
 def py_exec(args_wrapped, env):
     vals = [unwrap_from_py(a) for a in args_wrapped]
+    ns = py_namespace(env)
     if len(vals) == 1:
         if isinstance(vals[0], str):
-            exec(vals[0], py_globals, py_locals)
+            exec(vals[0], ns, ns)
         elif isinstance(vals[0], list):
-            exec("".join(vals[0]), py_globals, py_locals)
+            exec("".join(vals[0]), ns, ns)
     else:
-        exec("".join(vals), py_globals, py_locals)
+        exec("".join(vals), ns, ns)
     return {"type":"null", "value": None}
 
 def py_eval(args_wrapped, env):
     vals = [unwrap_from_py(a) for a in args_wrapped]
     if len(vals) == 1:
         if isinstance(vals[0], str):
-            return wrap_for_py(eval(vals[0], py_globals, py_locals))
+            ns = py_namespace(env)
+            return wrap_for_py(eval(vals[0], ns, ns))
         else:
             raise TypeError("evalPy expects a string")
     else:
@@ -776,7 +1752,11 @@ typesTable = {
     str: "str",
     list: "list",
     dict: "obj",
-    Function: "function"
+    Function: "function",
+    FileHandle: "file",
+    LineIterator: "lines",
+    MappedFile: "mmap",
+    Task: "task"
 }
 def py_type(args_wrapped, env):
     vals = [unwrap_from_py(a) for a in args_wrapped]
@@ -835,7 +1815,7 @@ ROS = {
 def register_pyfunc(env, name, pyfunc):
     env.set_here(name, Function(name, ["*args"], None, env, escapeToPython=True, pyfunc=pyfunc))
 
-def make_global_env(files):
+def make_global_env(files, interp=None):
     g = Env()
     g.set_here("print"        , Function("print"        , ["*values"]       , None, g, escapeToPython=True, pyfunc=py_print       ))
     g.set_here("len"          , Function("len"          , ["x"]             , None, g, escapeToPython=True, pyfunc=py_len         ))
@@ -850,11 +1830,140 @@ def make_global_env(files):
     g.set_here("isType"       , Function("isType"       , ["value", "type"] , None, g, escapeToPython=True, pyfunc=py_isType      ))
     g.set_here("input"        , Function("input"        , []                , None, g, escapeToPython=True, pyfunc=py_input       ))
     g.set_here("delay"        , Function("delay"        , ["sec"]           , None, g, escapeToPython=True, pyfunc=py_delay       ))
+    g.set_here("open"         , Function("open"         , ["path", "mode"]  , None, g, escapeToPython=True, pyfunc=py_open        ))
+    g.set_here("close"        , Function("close"        , ["handle"]        , None, g, escapeToPython=True, pyfunc=py_close       ))
+    g.set_here("readLine"     , Function("readLine"     , ["file"]          , None, g, escapeToPython=True, pyfunc=py_readLine    ))
+    g.set_here("write"        , Function("write"        , ["file", "text"]  , None, g, escapeToPython=True, pyfunc=py_write       ))
+    g.set_here("readLines"    , Function("readLines"    , ["source"]        , None, g, escapeToPython=True, pyfunc=py_readLines   ))
+    g.set_here("writeLines"   , Function("writeLines"   , ["target","lines"], None, g, escapeToPython=True, pyfunc=py_writeLines  ))
+    g.set_here("mmap"         , Function("mmap"         , ["path"]          , None, g, escapeToPython=True, pyfunc=py_mmap        ))
+    g.set_here("readRange"    , Function("readRange"    , ["view","a","b"]  , None, g, escapeToPython=True, pyfunc=py_readRange   ))
+    g.set_here("parallelMap"  , Function("parallelMap"  , ["fn","list","n"] , None, g, escapeToPython=True, pyfunc=py_parallelMap ))
+    g.set_here("processMap"   , Function("processMap"   , ["fn","list","n"] , None, g, escapeToPython=True, pyfunc=py_processMap  ))
+    g.set_here("spawn"        , Function("spawn"        , ["fn","*args"]    , None, g, escapeToPython=True, pyfunc=py_spawn       ))
+    g.set_here("await"        , Function("await"        , ["task"]          , None, g, escapeToPython=True, pyfunc=py_await       ))
+    g.set_here("awaitAll"     , Function("awaitAll"     , ["tasks"]         , None, g, escapeToPython=True, pyfunc=py_awaitAll    ))
 
     g.set_here("ROS"   , ROS)
     g.set_here("__importables__", files)
+    if interp is not None:
+        g.set_here("__interp__", interp)
     return g
 
+# ===== Profiler =====
+
+class Profiler(Tracer):
+    """
+    Attributes wall/cpu time and call counts to ros functions and source lines.
+
+    A Tracer, so runs without a profiler pay nothing for it. Time is charged to
+    whatever ros function and line is innermost when it passes (self time).
+
+    Usage:
+        with Profiler() as prof:
+            run(code)
+        prof.report()
+        prof.write_collapsed("out.folded")  # for flamegraph.pl / speedscope
+    """
+    def __init__(self):
+        self.funcs = {}   # name -> [calls, total wall, self wall, self cpu]
+        self.lines = {}   # (function, line) -> [hits, self wall, self cpu]
+        self.stacks = {}  # "main;f;g:12" -> self wall
+        self.local = threading.local()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        set_tracer(self)
+
+    def stop(self):
+        st = getattr(self.local, "st", None)
+        if st is not None:
+            self.charge(st)
+        set_tracer(None)
+
+    def state(self):
+        st = getattr(self.local, "st", None)
+        if st is None:
+            thread = threading.current_thread()
+            root = "main" if thread is threading.main_thread() else thread.name
+            st = self.local.st = types.SimpleNamespace(
+                funcs=[root], lines=[None], entered=[None], active={},
+                wall=time.perf_counter(), cpu=time.thread_time())
+        return st
+
+    def charge(self, st):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        dw, dc = wall - st.wall, cpu - st.cpu
+        st.wall, st.cpu = wall, cpu
+        name, line = st.funcs[-1], st.lines[-1]
+        f = self.funcs.setdefault(name, [0, 0.0, 0.0, 0.0])
+        f[2] += dw
+        f[3] += dc
+        key = ";".join(st.funcs)
+        if line is not None:
+            l = self.lines[(name, line)]
+            l[1] += dw
+            l[2] += dc
+            key = f"{key}:{line}"
+        self.stacks[key] = self.stacks.get(key, 0.0) + dw
+
+    def on_stmt(self, node, env):
+        if node["type"] == "block":
+            return
+        st = self.state()
+        self.charge(st)
+        line = node["span"][0]
+        st.lines[-1] = line
+        self.lines.setdefault((st.funcs[-1], line), [0, 0.0, 0.0])[0] += 1
+
+    def on_call(self, fn, args):
+        st = self.state()
+        self.charge(st)
+        name = fn.name
+        self.funcs.setdefault(name, [0, 0.0, 0.0, 0.0])[0] += 1
+        st.funcs.append(name)
+        st.lines.append(None)
+        st.entered.append(st.wall)
+        st.active[name] = st.active.get(name, 0) + 1
+
+    def on_return(self, fn, value):
+        st = self.state()
+        self.charge(st)
+        name = st.funcs.pop()
+        st.lines.pop()
+        entered = st.entered.pop()
+        st.active[name] -= 1
+        if not st.active[name]:
+            # recursion: only the outermost call adds to the total
+            self.funcs[name][1] += st.wall - entered
+
+    def report(self, out=None, limit=20):
+        out = out or sys.stderr
+        print(f"{'calls':>8} {'total s':>10} {'self s':>10} {'self cpu':>10}  function", file=out)
+        for name, (calls, total, own, cpu) in sorted(self.funcs.items(), key=lambda kv: -kv[1][2])[:limit]:
+            if not calls:
+                # a thread's root frame ("main", a worker) is never called, so it has no total
+                print(f"{'-':>8} {'-':>10} {own:>10.4f} {cpu:>10.4f}  {name}", file=out)
+                continue
+            print(f"{calls:>8} {total:>10.4f} {own:>10.4f} {cpu:>10.4f}  {name}", file=out)
+        print(f"\n{'hits':>8} {'self s':>10} {'self cpu':>10}  line", file=out)
+        for (name, line), (hits, own, cpu) in sorted(self.lines.items(), key=lambda kv: -kv[1][1])[:limit]:
+            print(f"{hits:>8} {own:>10.4f} {cpu:>10.4f}  {line} ({name})", file=out)
+
+    def write_collapsed(self, path):
+        # one "frame;frame;leaf:line microseconds" entry per stack
+        with open(path, "w", encoding="utf-8") as f:
+            for key, wall in sorted(self.stacks.items()):
+                us = int(wall * 1e6)
+                if us:
+                    f.write(f"{key} {us}\n")
+
 # ===== Runner =====
 
 import os
@@ -921,28 +2030,433 @@ def read_path(path, include_files=1, include_dirs=1, max_depth=1, flatten=0):
     return result
 
 libs_root = "E:/vs code/files/ruby-on-spaces/code-examples/2.x/libs"
+libs_cache = None
 
-if os.path.exists(libs_root):
-    files = read_path(libs_root, flatten=True)
+def default_files():
+    """
+    The modules under libs_root {relative path: source}, read on first use rather than at import.
+    """
+    global libs_cache
+    if libs_cache is None:
+        if os.path.exists(libs_root):
+            libs_cache = {
+                os.path.relpath(path, libs_root): text
+                for path, text in read_path(libs_root, flatten=True).items()
+            }
+        else:
+            libs_cache = {}
+    return libs_cache
 
-    files = {
-        os.path.relpath(path, libs_root): text
-        for path, text in files.items()
-    }
-else:
-    files = {}
+def __getattr__(name):
+    # `ruby.files` used to be filled at import time, keep it working for embedders
+    if name == "files":
+        return default_files()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def run(src, env=None, files=files):
+def run(src, env=None, files=None, asyncMode=False, budget=None):
     tokens = lex(src)
     parser = Parser(tokens)
     ast = parser.parse()
     if env is None:
-        env = make_global_env(files)
+        env = make_global_env(files if files is not None else default_files())
+    return run_ast(ast, env, asyncMode, budget)
+
+def run_ast(ast, env, asyncMode=False, budget=None):
+    if budget is not None:
+        # nested runs (imports) keep spending from the budget already in place
+        outer, limits.budget = limits.budget, budget
+        budget.start(env)
+        try:
+            run_ast(ast, env, asyncMode)
+        except BaseException as e:
+            if budget.account is not None:
+                budget.account.census(traceback_frames(e.__traceback__))
+            raise
+        else:
+            if budget.account is not None:
+                budget.account.census([])
+        finally:
+            budget.stop()
+            limits.budget = outer
+        return env
+    if asyncMode:
+        # delay/io yield to the loop and spawn/await become available; returns once every task is done
+        runtime = AsyncRuntime()
+        env.set_here("__async__", runtime)
+        try:
+            runtime.run_main(lambda args: exec_stmt(ast, env))
+        finally:
+            env.remove_here("__async__")
+        return env
     exec_stmt(ast, env)
     return env
 
+class Interpreter:
+    """
+    An isolated ros runtime: its own globals, python namespace (execPy/evalPy),
+    imported-module cache and parsed-source cache.
+
+    Instances share no mutable state with each other, so one instance per thread
+    is safe. Prepare an instance once (imports, definitions) and fork() it to get
+    cheap independent copies of that state.
+
+    Args:
+        files (dict): Importable modules {name: source}, defaults to the libs read at import.
+    """
+    ast_cache_size = 256
+
+    def __init__(self, files=None):
+        self.files = files if files is not None else default_files()
+        self.py_globals = {}
+        self.modules = {}
+        self.asts = {}
+        self.runtime = None
+        self.globals = make_global_env(self.files, self)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def parse(self, src):
+        ast = self.asts.get(src)
+        if ast is None:
+            ast = Parser(lex(src)).parse()
+            if len(self.asts) >= self.ast_cache_size:
+                del self.asts[next(iter(self.asts))]
+            self.asts[src] = ast
+        return ast
+
+    def run(self, src, asyncMode=False, budget=None):
+        if not asyncMode:
+            return run_ast(self.parse(src), self.globals, budget=budget)
+        self.runtime = AsyncRuntime()
+        try:
+            return run_ast(self.parse(src), self.globals, asyncMode=True, budget=budget)
+        finally:
+            self.runtime = None
+
+    def load_module(self, name):
+        if name not in self.modules:
+            modEnv = make_global_env(self.files, self)
+            run_ast(self.parse(self.files[name]), modEnv)
+            self.modules[name] = modEnv.get("module")
+        return self.modules[name]
+
+    def fork(self):
+        """
+        Copy this interpreter's prepared state into a new, independent Interpreter.
+
+        Globals (including functions and the scopes they close over) are copied, the
+        python namespace is copied shallowly and parsed sources are shared, since
+        ASTs are never mutated. Host handles (files, mmaps) stay shared.
+        """
+        child = copy.copy(self)
+        child.py_globals = dict(self.py_globals)
+        child.modules = {}
+        child.asts = dict(self.asts)
+        child.runtime = None
+        child.globals = copy.deepcopy(self.globals, {id(self): child})
+        return child
+
+def run_script_worker(ast, files):
+    # runs in a worker process; output is captured so scripts don't interleave
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            exec_stmt(ast, make_global_env(files))
+    except Exception as e:
+        return out.getvalue(), f"{type(e).__name__}: {e}"
+    return out.getvalue(), None
+
+def run_parallel(sources, jobs=None, files=None):
+    """
+    Run independent ros scripts in worker processes.
+
+    Args:
+        sources (list[str]): Script sources, parsed here and shipped to the workers as ASTs.
+        jobs (int): Number of worker processes (defaults to the cpu count).
+        files (dict): Importable modules, as for run().
+
+    Returns:
+        list: (output, error) per script in input order, error is None on success.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    if files is None:
+        files = default_files()
+    asts = [Parser(lex(src)).parse() for src in sources]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(run_script_worker, asts, [files] * len(asts)))
+
+# ===== Compiled programs (.rosc) =====
+# layout: magic | format (u16) | len(ver) (u16) | ROS["ver"] | sha256(source) | marshal(ast)
+# ASTs are plain dicts/lists/tuples of constants, so marshal round-trips them without running any code
+
+ROSC_MAGIC = b"ROSC"
+ROSC_FORMAT = 2  # bump whenever the AST node layout changes
+ROSC_HEADER = struct.Struct("<4sHH")
+
+def source_hash(src):
+    import hashlib
+    return hashlib.sha256(src.encode("utf-8")).digest()
+
+def compile_source(src):
+    """
+    Parse src and serialize its AST into .rosc bytes.
+    """
+    ast = Parser(lex(src)).parse()
+    ver = ROS["ver"].encode("utf-8")
+    return ROSC_HEADER.pack(ROSC_MAGIC, ROSC_FORMAT, len(ver)) + ver + source_hash(src) + marshal.dumps(ast)
+
+def is_compiled(data):
+    return data[:len(ROSC_MAGIC)] == ROSC_MAGIC
+
+def load_compiled(data, src=None):
+    """
+    Read the AST back out of .rosc bytes.
+
+    Args:
+        data (bytes): Contents of a .rosc file.
+        src (str): The source it was compiled from, if at hand; a hash mismatch means the artifact is stale.
+
+    Returns:
+        dict: The program AST, ready for run_ast().
+    """
+    if len(data) < ROSC_HEADER.size or not is_compiled(data):
+        raise ValueError("not a compiled ros program (bad magic)")
+    _, fmt, verLen = ROSC_HEADER.unpack_from(data)
+    if fmt != ROSC_FORMAT:
+        raise ValueError(f"compiled ros program has format {fmt}, this interpreter reads format {ROSC_FORMAT}, recompile it")
+    pos = ROSC_HEADER.size
+    if len(data) < pos + verLen + 32:
+        raise ValueError("not a compiled ros program (truncated or corrupt)")
+    ver = data[pos:pos + verLen].decode("utf-8", errors="replace")
+    pos += verLen
+    if ver != ROS["ver"]:
+        raise ValueError(f"compiled ros program is for ver {ver!r}, this is ver {ROS['ver']!r}, recompile it")
+    digest = data[pos:pos + 32]
+    pos += 32
+    if src is not None and digest != source_hash(src):
+        raise ValueError("compiled ros program is stale, its source has changed since, recompile it")
+    try:
+        ast = marshal.loads(data[pos:])
+    except (EOFError, ValueError, TypeError):
+        ast = None
+    if not isinstance(ast, dict):
+        raise ValueError("not a compiled ros program (truncated or corrupt)")
+    return ast
+
+def run_compiled(data, env=None, files=None, asyncMode=False, budget=None):
+    # same as run(), minus lexing and parsing
+    ast = load_compiled(data)
+    if env is None:
+        env = make_global_env(files if files is not None else default_files())
+    return run_ast(ast, env, asyncMode, budget)
+
+# ===== Watch mode =====
+
+class Watcher:
+    """
+    Re-run a script whenever it or a module in its libs folder changes.
+
+    Files are polled by (mtime, size) and only the ones that changed are read again.
+    Every run gets a fresh Interpreter (no state leaks from the previous run) but they
+    all share one AST cache keyed by source text, so an edit costs parsing the edited
+    file plus the run itself. Each poll drops cached ASTs whose source is gone.
+
+    Args:
+        path (str): The script to run.
+        libs (str): Folder of importable modules, keyed by file name like `--libs`.
+        interval (float): Seconds between polls.
+    """
+    def __init__(self, path, libs=None, interval=0.05):
+        self.path = path
+        self.libs = libs
+        self.interval = interval
+        self.stats = {}
+        self.texts = {}
+        self.asts = {}
+
+    def paths(self):
+        found = [self.path]
+        if self.libs is not None:
+            for root, dirs, names in os.walk(self.libs):
+                found += [os.path.join(root, name) for name in names]
+        return list(dict.fromkeys(found))
+
+    def poll(self):
+        """Read whatever was added or modified since the last poll, return the paths that changed."""
+        stats = {}
+        for path in self.paths():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # deleted, or mid-way through an editor's atomic save
+            stats[path] = (st.st_mtime_ns, st.st_size)
+        changed = {path for path, st in stats.items() if self.stats.get(path) != st}
+        changed |= self.stats.keys() - stats.keys()
+        for path in changed:
+            if path in stats:
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    self.texts[path] = f.read()
+            else:
+                self.texts.pop(path, None)
+        if changed:
+            # drop the ASTs of sources no file holds any more, or every save would keep one
+            live = set(self.texts.values())
+            self.asts = {src: ast for src, ast in self.asts.items() if src in live}
+        self.stats = stats
+        return changed
+
+    def run_once(self, asyncMode=False, budget=None):
+        files = {os.path.basename(path): text for path, text in self.texts.items() if path != self.path}
+        interp = Interpreter(files)
+        interp.asts = self.asts
+        return interp.run(self.texts[self.path], asyncMode=asyncMode, budget=budget)
+
+    def loop(self, asyncMode=False, budget=None):
+        self.poll()
+        while True:
+            if self.path in self.texts:
+                start = time.perf_counter()
+                try:
+                    self.run_once(asyncMode, budget)
+                except Exception as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                print(f"--- ran in {(time.perf_counter() - start) * 1000:.1f} ms, watching for changes (ctrl+c to stop)", file=sys.stderr)
+            changed = set()
+            while not changed:
+                time.sleep(self.interval)
+                changed = self.poll()
+            print(f"--- changed: {', '.join(sorted(changed))}", file=sys.stderr)
+
 # ===== Demo / REPL (optional) =====
 
+class Repl:
+    """
+    A persistent ros session: one Interpreter whose globals outlive every chunk.
+
+    Lines are buffered until the parser reads them as complete statements (an open
+    `def`/`if`/`while`/`for` keeps the chunk going), then only that chunk is parsed
+    and run. Executed chunks are kept with their AST so they can be re-run or saved.
+
+    Args:
+        interp (Interpreter): Session to run in, a fresh one by default.
+    """
+    def __init__(self, interp=None):
+        self.interp = interp if interp is not None else Interpreter()
+        self.buffer = []
+        self.history = []  # (source, ast) of every chunk that ran
+        self.timing = False
+
+    def feed(self, line):
+        """
+        Add one line of input.
+
+        Returns:
+            tuple | None: (source, ast) once the buffered lines form complete statements,
+                None while the chunk still needs more lines (or holds nothing).
+        """
+        self.buffer.append(line)
+        src = "\n".join(self.buffer)
+        try:
+            ast = Parser(lex(src)).parse_chunk()
+        except IncompleteInput:
+            return None
+        except SyntaxError:
+            self.buffer = []
+            raise
+        self.buffer = []
+        if not ast["stmts"]:
+            return None
+        return src, ast
+
+    def execute(self, src, ast):
+        """Run a parsed chunk in the session's globals, return the time it took in seconds."""
+        start = time.perf_counter()
+        try:
+            run_ast(ast, self.interp.globals)
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.timing:
+                print(f"---\nTime taken: {elapsed} sec")
+        # only chunks that ran through are kept, so a saved session replays cleanly
+        self.history.append((src, ast))
+        return elapsed
+
+    def command(self, line):
+        # session commands, only recognised outside of an unfinished chunk
+        words = line.split(maxsplit=1)
+        name, arg = words[0].lower(), (words[1].strip() if len(words) > 1 else "")
+        if arg.startswith(("=", "(", ".", "[")):
+            return False  # `time = 5`, `load(x)`, ... are ros code
+        if name == "exit":
+            raise EOFError
+        elif name == "clear":
+            self.buffer = []
+        elif name == "cls":
+            os.system("cls" if os.name == "nt" else "clear")
+        elif name == "time":
+            self.timing = not self.timing
+            print(f"timing {'on' if self.timing else 'off'}")
+        elif name == "history":
+            for n, (src, _) in enumerate(self.history, 1):
+                print(f"[{n}] " + src.replace("\n", "\n    "))
+        elif name == "run":
+            # run [time] [n]: re-run chunk n (default the last one) without parsing it again
+            args = arg.split()
+            timed = bool(args) and args[0] == "time"
+            args = args[1:] if timed else args
+            src, ast = self.history[int(args[0]) - 1 if args else -1]
+            elapsed = self.execute(src, ast)
+            if timed and not self.timing:
+                print(f"---\nTime taken: {elapsed} sec")
+        elif name == "reset":
+            self.interp = Interpreter(self.interp.files)
+            self.history = []
+        elif name == "save":
+            with open(arg, "w", encoding="utf-8") as f:
+                f.write("".join(src + "\n" for src, _ in self.history) + "end\n")
+            print("---")
+        elif name == "load":
+            with open(arg, "r", encoding="utf-8") as f:
+                src = f.read()
+            self.execute(src, Parser(lex(src)).parse_chunk())
+        else:
+            return False
+        return True
+
+    def loop(self):
+        print(f"ROS(Ruby On Spaces) ver:{ROS['ver']}")
+        print("Statements run as soon as they are complete, definitions stay for the whole session.\n"
+              "'time' to toggle timing every chunk \n'run [time] [n]' to run the last (or n-th) chunk again \n"
+              "'history' to list the chunks \n'clear' to drop an unfinished chunk \n'reset' to start over with fresh globals \n"
+              "'save <path>' to save the session into a file \n'load <path>' to run a file in the session \n'cls' to clear the terminal \n'exit' to exit")
+        try:
+            import readline  # line editing and arrow-key history where available
+        except ImportError:
+            pass
+        maxDigits = 4
+        while True:
+            lineNo = len(self.buffer) + 1
+            try:
+                line = input(f"[{str(lineNo).zfill(maxDigits)}]{'>' if lineNo == 1 else '|'} ")
+                striped = line.strip()
+                if lineNo == 1:
+                    if not striped or self.command(striped):
+                        continue
+                elif striped.lower() == "clear":
+                    self.buffer = []
+                    continue
+                chunk = self.feed(line)
+                if chunk is not None:
+                    self.execute(*chunk)
+            except EOFError:
+                break
+            except KeyboardInterrupt:
+                self.buffer = []
+                print()
+            except Exception as e:
+                print(f"Error: {e}")
+
 
 if __name__ == "__main__":
 
@@ -958,86 +2472,113 @@ if __name__ == "__main__":
                     files_dict[fname] = f"[Error reading file: {e}]"
         return files_dict
     
-    if len(sys.argv) > 1:
-        with open(sys.argv[1], "r", encoding="utf-8") as f:
-            code = f.read()
-        if len(sys.argv) == 4 and sys.argv[2] == "--libs" and os.path.exists(sys.argv[3]):
-            run(code, make_global_env(read_files_recursive(sys.argv[3])))
-        else:
-            run(code)
-    else:
-        print(f"ROS(Ruby On Spaces) ver:{ROS['ver']}")
-        print("Type 'run' to execute block \n'clear' to clear block \n'save <path>' to save block into a file \n'load <path>' to load a file \n'last' to load the last ran block into the current block \n'cls' to clear the terminal \n'exit' to exit")
-        lineNo = 1
-        toExec = []
-        lastRan = []
-        maxDigits = 4
-        while True:
+    if len(sys.argv) > 2 and sys.argv[1] == "compile":
+        # compile a.ros [b.ros ...] [-o out.rosc], output defaults to the source path with .rosc
+        args = sys.argv[2:]
+        out = None
+        if "-o" in args:
+            i = args.index("-o")
+            out = args[i + 1]
+            del args[i:i + 2]
+            if len(args) != 1:
+                sys.exit("-o takes a single source file")
+        for path in args:
+            with open(path, "r", encoding="utf-8") as f:
+                src = f.read()
             try:
-                line = input(f"[{str(lineNo).zfill(maxDigits)}]> ")
-                striped = line.strip()
-                if striped.lower().startswith("run"):
-                    arg1 = striped[4:]
-                    if arg1 == "time":
-                        code = "\n".join(toExec)
-                        start = time.time()
-                        run(code)
-                        end = time.time()
-                        print(f"---\nTime taken: {end - start} sec")
-                        lastRan = toExec
-                        toExec = []
-                        lineNo = 1
-                        continue
-                    else:
-                        code = "\n".join(toExec)
-                        run(code)
-                        lastRan = toExec
-                        toExec = []
-                        lineNo = 1
-                        continue
-                    
-                elif striped.lower().startswith("exit"):
-                    quit()
-
-                elif striped.lower().startswith("cls"):
-                    os.system("cls")
-
-                elif striped.lower().startswith("clear"):
-                    toExec = []
-                    lineNo = 1
-                    continue
-
-                elif striped.lower().startswith("save"):
-                    with open(line.split()[1], "w") as f:
-                        f.writelines(toExec)
-                    toExec = []
-                    lineNo = 1
-                    print("---")
-                    continue
-
-                elif striped.lower().startswith("load"):
-                    with open(striped[5:], "r") as f:
-                        toExec = f.readlines()
-                        lineNo = len(toExec) + 1
-                        for i, line in enumerate(toExec):
-                            print(f"[{str(i + 1).zfill(maxDigits)}]> {line.strip()}")
-                    continue
-
-                elif striped.lower().startswith("last"):
-                    toExec = lastRan
-                    for i, line in enumerate(lastRan):
-                        print(f"[{str(i + 1).zfill(maxDigits)}]> {line.strip()}")
-                    i = len(toExec) + 1
-                    continue
-
-                else:
-                    toExec.append(line)
-
-                lineNo += 1
-
-            except EOFError:
-                break
+                data = compile_source(src)
             except Exception as e:
-                print(f"Error: {e}")
-                toExec = []
-                lineNo = 0
+                sys.exit(f"Error in {path}: {e}")
+            target = out or os.path.splitext(path)[0] + ".rosc"
+            with open(target, "wb") as f:
+                f.write(data)
+            print(f"{path} -> {target}")
+    elif len(sys.argv) > 2 and sys.argv[1] == "--jobs":
+        args = sys.argv[2:]
+        libs = default_files()
+        if "--libs" in args:
+            i = args.index("--libs")
+            libs = read_files_recursive(args[i + 1])
+            del args[i:i + 2]
+        jobs, paths = int(args[0]), args[1:]
+        sources = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                sources.append(f.read())
+        failed = 0
+        for path, (out, err) in zip(paths, run_parallel(sources, jobs, libs)):
+            if len(paths) > 1:
+                print(f"==> {path} <==")
+            sys.stdout.write(out)
+            sys.stdout.flush()
+            if err is not None:
+                print(f"Error in {path}: {err}", file=sys.stderr)
+                failed += 1
+        sys.exit(1 if failed else 0)
+    elif len(sys.argv) > 1:
+        asyncMode = "--async" in sys.argv
+        if asyncMode:
+            sys.argv.remove("--async")
+        # --watch[=SEC] re-runs the script whenever it or a file under --libs changes
+        watchArg = next((a for a in sys.argv if a == "--watch" or a.startswith("--watch=")), None)
+        if watchArg is not None:
+            sys.argv.remove(watchArg)
+        # --profile prints a report to stderr, --profile=out.folded also writes collapsed stacks
+        profileArg = next((a for a in sys.argv if a == "--profile" or a.startswith("--profile=")), None)
+        if profileArg is not None:
+            sys.argv.remove(profileArg)
+        profiler = Profiler() if profileArg is not None else None
+        # --max-steps=N --max-time=SEC --max-memory=MB abort the run once it goes over
+        budgetArgs = {}
+        for flag, key, conv in (("--max-steps=", "max_steps", int), ("--max-time=", "max_time", float),
+                                ("--max-memory=", "max_memory", lambda mb: int(float(mb) * 1024 * 1024))):
+            arg = next((a for a in sys.argv if a.startswith(flag)), None)
+            if arg is not None:
+                sys.argv.remove(arg)
+                budgetArgs[key] = conv(arg[len(flag):])
+        # --mem-report prints the largest live ros variables at exit or on error,
+        # --max-env-memory=MB aborts once they hold more than that
+        memReport = "--mem-report" in sys.argv
+        if memReport:
+            sys.argv.remove("--mem-report")
+        envLimit = next((a for a in sys.argv if a.startswith("--max-env-memory=")), None)
+        if envLimit is not None:
+            sys.argv.remove(envLimit)
+            envLimit = int(float(envLimit.split("=", 1)[1]) * 1024 * 1024)
+        if memReport or envLimit is not None:
+            budgetArgs["account"] = MemoryAccount(limit=envLimit, every=1000)
+        budget = Budget(**budgetArgs) if budgetArgs else None
+        if watchArg is not None:
+            libs = sys.argv[3] if len(sys.argv) == 4 and sys.argv[2] == "--libs" else None
+            interval = float(watchArg.split("=", 1)[1]) if "=" in watchArg else 0.05
+            try:
+                Watcher(sys.argv[1], libs, interval).loop(asyncMode, budget)
+            except KeyboardInterrupt:
+                pass
+            sys.exit(0)
+        with open(sys.argv[1], "rb") as f:
+            code = f.read()
+        # .rosc files (see `compile`) skip the parser, anything else is source
+        runner = run_compiled if is_compiled(code) else run
+        if runner is run:
+            code = code.decode("utf-8")
+        if profiler is not None:
+            profiler.start()
+        try:
+            if len(sys.argv) == 4 and sys.argv[2] == "--libs" and os.path.exists(sys.argv[3]):
+                runner(code, make_global_env(read_files_recursive(sys.argv[3])), asyncMode=asyncMode, budget=budget)
+            else:
+                runner(code, asyncMode=asyncMode, budget=budget)
+        except BudgetExceeded as e:
+            print(f"Aborted: {e} ({e.metrics['steps']} steps, {e.metrics['wall']:.3f} sec)", file=sys.stderr)
+            sys.exit(3)
+        finally:
+            if memReport:
+                budget.account.report()
+            if profiler is not None:
+                profiler.stop()
+                profiler.report()
+                if "=" in profileArg:
+                    profiler.write_collapsed(profileArg.split("=", 1)[1])
+    else:
+        Repl().loop()
@@ -0,0 +1,229 @@
+"""
+Regression tests for ver2.1, run from this folder:
+
+    python -m unittest test_ruby
+"""
+import os, sys, time, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ruby
+
+
+def output(src, budget=None):
+    import contextlib, io
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        ruby.run(src, files={}, budget=budget)
+    return out.getvalue()
+
+
+class BudgetTest(unittest.TestCase):
+    def run_limited(self, src, **limits):
+        budget = ruby.Budget(**limits)
+        start = time.perf_counter()
+        with self.assertRaises(ruby.BudgetExceeded) as caught:
+            ruby.run(src, files={}, budget=budget)
+        return caught.exception, time.perf_counter() - start
+
+    def test_empty_while_spends_steps(self):
+        exc, _ = self.run_limited("while (1)\nend\nend\n", max_steps=1000)
+        self.assertEqual(exc.kind, "steps")
+
+    def test_empty_for_spends_steps(self):
+        exc, _ = self.run_limited("for (i = 0; 1; i = i)\nend\nend\n", max_steps=1000)
+        self.assertEqual(exc.kind, "steps")
+
+    def test_empty_while_hits_time_limit(self):
+        exc, spent = self.run_limited("while (1)\nend\nend\n", max_time=0.2)
+        self.assertEqual(exc.kind, "time")
+        self.assertLess(spent, 5)
+
+
+class CompiledTest(unittest.TestCase):
+    def test_truncated_rosc_is_refused_cleanly(self):
+        data = ruby.compile_source('print("hi")\nend\n')
+        for cut in (len(data) - 1, len(data) - 10, ruby.ROSC_HEADER.size + 1):
+            with self.assertRaisesRegex(ValueError, "not a compiled ros program"):
+                ruby.load_compiled(data[:cut])
+
+
+class ReplTest(unittest.TestCase):
+    def run_lines(self, repl, lines):
+        import contextlib, io
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            for line in lines:
+                chunk = repl.feed(line)
+                if chunk is not None:
+                    repl.execute(*chunk)
+        return out.getvalue()
+
+    def test_expression_continues_after_operator(self):
+        repl = ruby.Repl(ruby.Interpreter(files={}))
+        self.assertIsNone(repl.feed("print(1 +"))
+        self.assertEqual(self.run_lines(repl, ["2)"]), "3\n")
+
+    def test_expression_continues_inside_brackets(self):
+        repl = ruby.Repl(ruby.Interpreter(files={}))
+        out = self.run_lines(repl, ["x = [1,", "2", "]", "print(len(x), x[1])"])
+        self.assertEqual(out, "2 2\n")
+
+
+class WatcherTest(unittest.TestCase):
+    def test_reruns_get_the_whole_budget_each(self):
+        import contextlib, io, tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "main.ros")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("total = 0\nfor (i = 0; i < 100; i = i + 1)\ntotal = total + i\nend\nprint(total)\nend\n")
+            watcher = ruby.Watcher(path)
+            watcher.poll()
+            # one run takes a bit over 200 steps, five of them would not fit in 500 together
+            budget = ruby.Budget(max_steps=500)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                for _ in range(5):
+                    watcher.run_once(budget=budget)
+                    self.assertLess(budget.steps, 500)
+            self.assertEqual(out.getvalue(), "4950\n" * 5)
+
+    def test_ast_cache_keeps_only_current_sources(self):
+        import contextlib, io, tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "main.ros")
+            watcher = ruby.Watcher(path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for n in range(5):
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(f"print({n})\nend\n" + " " * n)  # the size changes even if mtime does not
+                    self.assertEqual(watcher.poll(), {path})
+                    watcher.run_once()
+            self.assertEqual(list(watcher.asts), [watcher.texts[path]])
+
+
+class ParallelMapTest(unittest.TestCase):
+    def test_tasks_update_their_own_copy_of_a_shared_counter(self):
+        import contextlib, io
+        # every task reads counter, waits, then writes it back; with one shared scope
+        # the writes would race, with forked scopes each task sees 0 and nothing leaks out
+        src = (
+            "counter = 0\n"
+            "def slow()\ndelay(0.01)\nreturn 1\nend\n"
+            "def bump(i)\ncounter = counter + slow()\nreturn counter\nend\n"
+            "print(parallelMap(bump, range(8), 8), counter)\nend\n"
+        )
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            ruby.run(src, files={})
+        self.assertEqual(out.getvalue(), "[1, 1, 1, 1, 1, 1, 1, 1] 0\n")
+
+
+class ForInTest(unittest.TestCase):
+    def test_break_closes_line_stream(self):
+        import contextlib, io, tempfile
+        from unittest import mock
+        closed = []
+        real_close = ruby.FileHandle.close
+        def close(handle):
+            closed.append(handle.path)
+            real_close(handle)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("a\nb\nc\n")
+            src = f'for line in readLines("{path}")\nprint(line)\nbreak\nend\nprint("done")\nend\n'
+            out = io.StringIO()
+            with mock.patch.object(ruby.FileHandle, "close", close), contextlib.redirect_stdout(out):
+                ruby.run(src, files={})
+                self.assertEqual(closed, [path])
+        self.assertEqual(out.getvalue(), "a\ndone\n")
+
+
+class LogicTest(unittest.TestCase):
+    def test_literals(self):
+        self.assertEqual(output("print(true, false, null)\nend\n"), "True False None\n")
+
+    def test_right_operand_only_runs_when_needed(self):
+        src = (
+            'def mark(v)\nprint("mark", v)\nreturn v\nend\n'
+            "print(mark(0) and mark(1))\n"
+            "print(mark(2) or mark(3))\n"
+            "x = 0\nprint(x != 0 and 10 / x > 1)\nend\n"
+        )
+        self.assertEqual(output(src), "mark 0\n0\nmark 2\n2\nFalse\n")
+
+    def test_value_is_the_deciding_operand(self):
+        src = 'print(null or "default", 1 and "x", 0 and "x", "" or 0)\nend\n'
+        self.assertEqual(output(src), "default x 0 0\n")
+
+    def test_not_and_precedence(self):
+        src = 'print(not 0, not "a", not 1 == 2)\nprint(1 < 2 and 3 > 4 or 5 == 5)\nend\n'
+        self.assertEqual(output(src), "True False True\nTrue\n")
+
+
+class ControlFlowTest(unittest.TestCase):
+    def test_elif_else_chain(self):
+        src = (
+            "def grade(n)\n"
+            'if n > 90\nreturn "a"\nelif n > 80\nreturn "b"\nelif n > 70\nreturn "c"\nelse\nreturn "f"\nend\n'
+            "end\n"
+            "print(grade(95), grade(85), grade(75), grade(10))\nend\n"
+        )
+        self.assertEqual(output(src), "a b c f\n")
+
+    def test_break_and_continue_leave_only_the_innermost_loop(self):
+        src = (
+            "for (i = 0; i < 3; i = i + 1)\n"
+            "j = 0\n"
+            "while (j < 10)\n"
+            "j = j + 1\n"
+            "if j == 2\ncontinue\nend\n"
+            "if j > 3\nbreak\nend\n"
+            "print(i, j)\n"
+            "end\n"
+            "if i == 1\nbreak\nend\n"
+            "end\n"
+            "for x in [1, 2, 3, 4]\n"
+            "for (k = 0; k < 5; k = k + 1)\n"
+            "if k == 1\ncontinue\nelif k == 3\nbreak\nend\n"
+            "print(x, k)\n"
+            "end\n"
+            "if x == 2\ncontinue\nend\n"
+            "if x == 3\nbreak\nend\n"
+            'print("x", x)\n'
+            "end\nend\n"
+        )
+        self.assertEqual(output(src), (
+            "0 1\n0 3\n1 1\n1 3\n"
+            "1 0\n1 2\nx 1\n2 0\n2 2\n3 0\n3 2\n"
+        ))
+
+    def test_continue_still_runs_the_for_step(self):
+        # without the step this loop would never end, the budget turns that into a failure
+        src = "for (i = 0; i < 5; i = i + 1)\ncontinue\nend\nprint(i)\nend\n"
+        self.assertEqual(output(src, ruby.Budget(max_steps=1000)), "5\n")
+
+    def test_break_outside_a_loop_is_a_syntax_error(self):
+        for src in (
+            "break\nend\n",
+            "for x in [1]\nend\ncontinue\nend\n",
+            "while (1)\ndef f()\nbreak\nend\nend\nend\n",
+        ):
+            with self.assertRaisesRegex(SyntaxError, "outside of a loop"):
+                ruby.run(src, files={})
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_root_frame_has_no_total(self):
+        import io
+        with ruby.Profiler() as prof:
+            output("def f(n)\nreturn n + 1\nend\nx = f(1)\nend\n")
+        out = io.StringIO()
+        prof.report(out)
+        rows = {line.split()[-1]: line.split()[:2] for line in out.getvalue().split("\n\n")[0].splitlines()[1:]}
+        self.assertEqual(rows["main"], ["-", "-"])
+        self.assertEqual(rows["f"][0], "1")
+
+
+if __name__ == "__main__":
+    unittest.main()